@@ -0,0 +1,110 @@
+"""Allocation micro-benchmark for the segment pipeline (normalize, prepare, native build).
+
+Compares the current copy-on-write pipeline against a legacy variant that
+re-applies the deep copies the pipeline used to make:
+
+    python benchmarks/bench_segments.py --messages 2000 --targets 3
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from fake_bot import message_event
+from run_benchmarks import SELF_ID, Bench, parse_args as parse_bench_args
+
+
+def legacy_plugin_class(base: type) -> type:
+    class LegacyRecallGuardPlugin(base):
+        def _normalize_segment(self, segment: Dict[str, Any]) -> Dict[str, Any]:
+            return super()._normalize_segment(copy.deepcopy(segment))
+
+        async def _prepare_media_segment(self, event: Any, cache_key: str, segment: Dict[str, Any]) -> Dict[str, Any]:
+            return await super()._prepare_media_segment(event, cache_key, copy.deepcopy(segment))
+
+        def _segment_to_native(self, segment: Dict[str, Any]) -> Dict[str, Any]:
+            return super()._segment_to_native({**segment, "data": copy.deepcopy(segment.get("data", {}))})
+
+    return LegacyRecallGuardPlugin
+
+
+def raw_segments(bench: Bench, message_id: int) -> List[Dict[str, Any]]:
+    file_ref = f"bench-{message_id}"
+    media_path = bench.api.create_media(file_ref, "get_image")
+    card = {"app": "com.tencent.structmsg", "meta": {"news": {"title": "benchmark", "desc": "x" * 512, "tag": "bench"}}}
+    return [
+        {"type": "reply", "data": {"id": str(message_id - 1)}},
+        {"type": "text", "data": {"text": f"benchmark message {message_id} " * 4}},
+        {"type": "face", "data": {"id": "178", "raw": {"faceIndex": 178, "faceText": "[斜眼笑]", "faceType": 1}}},
+        {"type": "image", "data": {"file": f"{file_ref}.image", "path": media_path, "summary": "[图片]", "file_size": "65536"}},
+        {"type": "json", "data": {"data": json.dumps(card, ensure_ascii=False)}},
+    ]
+
+
+async def run_pipeline(bench: Bench, messages: int, targets: int) -> Dict[str, float]:
+    plugin = bench.plugin
+    record_class = bench.module.CacheRecord
+    group_id, user_id = bench.groups[0], bench.users[0]
+    batches = []
+    for index in range(messages):
+        message_id = 2_000_000 + index
+        segments = raw_segments(bench, message_id)
+        batches.append((message_event(bench.bot, SELF_ID, message_id, group_id, user_id, segments), message_id, segments))
+
+    retained: List[Any] = []
+    tracemalloc.start()
+    baseline_bytes, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    for event, message_id, segments in batches:
+        cache_key = f"group:{group_id}:{message_id}"
+        normalized = plugin._filter_segments_by_config([plugin._normalize_segment(segment) for segment in segments])
+        prepared = await plugin._prepare_cache_segments(event, cache_key, normalized)
+        record = record_class(str(message_id), cache_key, user_id, "bench", group_id, time.time(), prepared)
+        payloads = [plugin._build_native_segments(record) for _ in range(targets)]
+        retained.append((record, payloads))
+    elapsed = time.perf_counter() - started
+    current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "us_per_message": round(elapsed / messages * 1e6, 1),
+        "retained_bytes_per_message": round((current_bytes - baseline_bytes) / messages, 1),
+        "peak_bytes_per_message": round((peak_bytes - baseline_bytes) / messages, 1),
+    }
+
+
+async def measure(legacy: bool, args: argparse.Namespace) -> Dict[str, float]:
+    bench = Bench(parse_bench_args(["--seed", str(args.seed)]))
+    if legacy:
+        bench.plugin_class = legacy_plugin_class(bench.module.RecallGuardPlugin)
+    try:
+        await bench.start()
+        try:
+            return await run_pipeline(bench, args.messages, args.targets)
+        finally:
+            await bench.stop()
+    finally:
+        bench.close()
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--targets", type=int, default=3, help="native payloads built per message")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    legacy = await measure(True, args)
+    current = await measure(False, args)
+    for name in current:
+        change = (current[name] - legacy[name]) / legacy[name] if legacy[name] else 0.0
+        print(f"{name}: legacy={legacy[name]} current={current[name]} ({change:+.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,172 @@
+"""Local stand-ins for the OneBot bot client, AstrBot context and events used by the benchmarks."""
+
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiocqhttp.exceptions import ActionFailed
+from astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event import AiocqhttpMessageEvent
+
+
+MEDIA_ACTIONS = {"get_image": ".jpg", "get_record": ".mp3", "get_file": ".mp4"}
+
+
+class FakeApi:
+    def __init__(
+        self,
+        media_dir: str,
+        latency: float = 0.01,
+        jitter: float = 0.5,
+        failure_rate: float = 0.0,
+        media_size: int = 64 * 1024,
+        unsupported: Tuple[str, ...] = (),
+        seed: int = 0,
+    ):
+        self.media_dir = media_dir
+        self.latency = max(latency, 0)
+        self.jitter = min(max(jitter, 0), 1)
+        self.failure_rate = failure_rate
+        self.media_size = media_size
+        self.unsupported = set(unsupported)
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.sent: List[Tuple[str, float]] = []
+        self.messages: Dict[int, Dict[str, Any]] = {}
+        self._message_seq = 0
+        os.makedirs(media_dir, exist_ok=True)
+
+    def media_path(self, file_ref: str, action: str) -> str:
+        return os.path.join(self.media_dir, f"{file_ref}{MEDIA_ACTIONS[action]}")
+
+    def create_media(self, file_ref: str, action: str) -> str:
+        path = self.media_path(file_ref, action)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(self.random.randbytes(self.media_size))
+        return path
+
+    def remember_message(self, message_id: int, group_id: str, user_id: str, segments: List[Dict[str, Any]]):
+        self.messages[message_id] = {
+            "message_id": message_id,
+            "message_type": "group" if group_id else "private",
+            "group_id": int(group_id) if group_id else None,
+            "user_id": int(user_id),
+            "sender": {"user_id": int(user_id), "nickname": f"user-{user_id}"},
+            "time": int(time.time()),
+            "message": segments,
+        }
+
+    def _delay(self) -> float:
+        return self.latency * (1 + self.jitter * (2 * self.random.random() - 1))
+
+    def _fail(self, action: str, retcode: int):
+        self.failures[action] += 1
+        raise ActionFailed({"status": "failed", "retcode": retcode, "data": None})
+
+    async def call_action(self, action: str, **params) -> Any:
+        self.calls[action] += 1
+        await asyncio.sleep(self._delay())
+        if action in self.unsupported:
+            self._fail(action, 1404)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self._fail(action, 100)
+        if action in MEDIA_ACTIONS:
+            file_ref = str(params.get("file") or params.get("file_id") or "")
+            path = self.media_path(file_ref, action)
+            if not os.path.exists(path):
+                self._fail(action, 404)
+            return {"file": path}
+        if action == "get_msg":
+            message = self.messages.get(int(params.get("message_id") or 0))
+            if message is None:
+                self._fail(action, 1200)
+            return message
+        if action == "get_group_info":
+            return {"group_id": params.get("group_id"), "group_name": f"bench-group-{params.get('group_id')}"}
+        if action.startswith("send_"):
+            self._message_seq += 1
+            self.sent.append((action, time.perf_counter()))
+            return {"message_id": self._message_seq}
+        self._fail(action, 1404)
+
+
+class FakeBot:
+    def __init__(self, api: FakeApi):
+        self.api = api
+
+
+class FakeContext:
+    def __init__(self, api: FakeApi):
+        self.api = api
+
+    async def send_message(self, session_id: str, message_chain: Any) -> bool:
+        self.api.calls["astrbot_send_message"] += 1
+        await asyncio.sleep(self.api._delay())
+        self.api.sent.append(("astrbot_send_message", time.perf_counter()))
+        return True
+
+
+class FakeEvent(AiocqhttpMessageEvent):
+    def __init__(
+        self,
+        bot: FakeBot,
+        self_id: str,
+        raw_message: Dict[str, Any],
+        sender_id: str,
+        group_id: str = "",
+        sender_name: str = "",
+        message_id: Optional[str] = None,
+    ):
+        self.bot = bot
+        self._self_id = self_id
+        self._sender_id = sender_id
+        self._group_id = group_id
+        self._sender_name = sender_name or f"user-{sender_id}"
+        self.message_obj = SimpleNamespace(
+            raw_message=raw_message,
+            message_id=message_id if message_id is not None else raw_message.get("message_id", ""),
+            message=[],
+            self_id=self_id,
+            group_id=group_id,
+        )
+
+    def get_self_id(self) -> str:
+        return self._self_id
+
+    def get_sender_id(self) -> str:
+        return self._sender_id
+
+    def get_group_id(self) -> str:
+        return self._group_id
+
+    def get_sender_name(self) -> str:
+        return self._sender_name
+
+
+def message_event(bot: FakeBot, self_id: str, message_id: int, group_id: str, user_id: str, segments: List[Dict[str, Any]]) -> FakeEvent:
+    raw = {
+        "post_type": "message",
+        "message_type": "group" if group_id else "private",
+        "message_id": message_id,
+        "group_id": int(group_id) if group_id else None,
+        "user_id": int(user_id),
+        "message": segments,
+    }
+    return FakeEvent(bot, self_id, raw, user_id, group_id, message_id=str(message_id))
+
+
+def recall_event(bot: FakeBot, self_id: str, message_id: int, group_id: str, user_id: str) -> FakeEvent:
+    raw = {
+        "post_type": "notice",
+        "notice_type": "group_recall" if group_id else "friend_recall",
+        "message_id": message_id,
+        "group_id": int(group_id) if group_id else None,
+        "user_id": int(user_id),
+        "operator_id": int(user_id),
+    }
+    return FakeEvent(bot, self_id, raw, user_id, group_id, message_id="")
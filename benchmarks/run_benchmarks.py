@@ -0,0 +1,343 @@
+"""Offline benchmarks for RecallGuard driven by a fake OneBot bot client.
+
+Run from an environment where AstrBot and aiocqhttp are importable:
+
+    python benchmarks/run_benchmarks.py                      # all scenarios
+    python benchmarks/run_benchmarks.py -s recall_storm --latency-ms 50
+    python benchmarks/run_benchmarks.py --save-baseline      # write benchmarks/baselines.json
+    python benchmarks/run_benchmarks.py --compare            # diff against the stored baselines
+
+Baselines are machine specific; save them on the machine you compare on.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fake_bot import FakeApi, FakeBot, FakeContext, message_event, recall_event
+
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "recallguard_bench"
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+SELF_ID = "10000"
+TARGET_SESSION = "aiocqhttp:GroupMessage:99999"
+HIGHER_IS_BETTER = {"throughput_per_s"}
+COMPARED_METRICS = ("throughput_per_s", "p50_ms", "p99_ms", "peak_alloc_kb")
+
+
+def load_plugin_module() -> types.ModuleType:
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [PLUGIN_DIR]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.main")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def read_proc_io() -> Dict[str, int]:
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            return {key: int(value) for key, value in (line.split(": ") for line in f)}
+    except (OSError, ValueError):
+        return {}
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.module = load_plugin_module()
+        self.plugin_class = self.module.RecallGuardPlugin
+        self.workdir = tempfile.mkdtemp(prefix="recallguard-bench-")
+        self.rng = random.Random(args.seed)
+        self.groups = [str(700000 + index) for index in range(args.groups)]
+        self.users = [str(800000 + index) for index in range(args.users)]
+        self.api = FakeApi(
+            os.path.join(self.workdir, "napcat"),
+            latency=args.latency_ms / 1000,
+            failure_rate=args.failure_rate,
+            media_size=args.media_kb * 1024,
+            unsupported=tuple(args.unsupported),
+            seed=args.seed,
+        )
+        self.bot = FakeBot(self.api)
+        self.plugin = None
+        self._message_seq = 0
+        self.messages: List[tuple] = []
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "group_monitoring": {
+                "enable_group_monitoring": True,
+                "monitored_groups": [f"aiocqhttp:GroupMessage:{group_id}" for group_id in self.groups],
+            },
+            "forwarding_options": {
+                "forwarding_format": self.args.forward_format,
+                "target_sessions": [TARGET_SESSION],
+                "target_rate_per_minute": 0,
+                "forward_message_text": "用户 {user_name}({user_id}) 在群 {group_name}({group_id}) 撤回了一条消息：",
+            },
+            "cleanup_options": {
+                "cache_dir": os.path.join(self.workdir, "cache"),
+                "cache_lifetime_seconds": 86400,
+                "cleanup_interval_seconds": 3600,
+                "max_cache_size_mb": self.args.max_cache_size_mb,
+            },
+            "performance_options": {
+                "recall_wait_timeout_seconds": 5,
+                "media_capture_mode": self.args.capture_mode,
+                "ingest_queue_size": self.args.ingest_queue_size,
+                "recall_source": self.args.recall_source,
+                "precache_media_only": self.args.precache_media_only,
+            },
+        }
+
+    async def start(self):
+        self.plugin = self.plugin_class(FakeContext(self.api), self.config())
+        await asyncio.sleep(0)
+
+    async def stop(self):
+        await self.plugin.terminate()
+        for cache_key in list(self.module.MESSAGE_CACHE):
+            self.module.MESSAGE_CACHE.pop(cache_key)
+
+    def close(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def next_message(self) -> tuple:
+        self._message_seq += 1
+        message_id = 1_000_000 + self._message_seq
+        group_id = self.rng.choice(self.groups)
+        user_id = self.rng.choice(self.users)
+        segments = [{"type": "text", "data": {"text": f"benchmark message {message_id} " * self.rng.randint(1, 8)}}]
+        if self.rng.random() < self.args.image_ratio:
+            file_ref = f"bench-{message_id}"
+            self.api.create_media(file_ref, "get_image")
+            segments.append({"type": "image", "data": {"file": file_ref, "summary": "[图片]"}})
+        if self.args.get_msg_ratio >= 1 or self.rng.random() < self.args.get_msg_ratio:
+            self.api.remember_message(message_id, group_id, user_id, segments)
+        return message_id, group_id, user_id, segments
+
+    def generate(self, count: int) -> List[tuple]:
+        batch = [self.next_message() for _ in range(count)]
+        self.messages.extend(batch)
+        return batch
+
+    async def flood(self, batch: List[tuple], concurrency: int) -> List[float]:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def deliver(message_id: int, group_id: str, user_id: str, segments: List[Dict[str, Any]]):
+            async with semaphore:
+                event = message_event(self.bot, SELF_ID, message_id, group_id, user_id, segments)
+                started = time.perf_counter()
+                await self.plugin.on_message(event)
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(deliver(*message) for message in batch))
+        await self.drain()
+        return latencies
+
+    async def drain(self):
+        while len(self.plugin.ingest_queue) or self.plugin.inflight_preparations:
+            await asyncio.sleep(0.005)
+
+    async def recall(self, messages: List[tuple]) -> List[float]:
+        latencies: List[float] = []
+
+        async def deliver(message_id: int, group_id: str, user_id: str, _segments: Any):
+            event = recall_event(self.bot, SELF_ID, message_id, group_id, user_id)
+            started = time.perf_counter()
+            await self.plugin.on_recall_notice(event)
+            latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(deliver(*message) for message in messages))
+        return latencies
+
+
+async def scenario_flood(bench: Bench) -> Dict[str, Any]:
+    batch = bench.generate(bench.args.messages)
+    return await measure(bench, lambda: bench.flood(batch, bench.args.concurrency), len(batch))
+
+
+async def scenario_recall_storm(bench: Bench) -> Dict[str, Any]:
+    await bench.flood(bench.generate(bench.args.messages), bench.args.concurrency)
+    victims = bench.rng.sample(bench.messages, min(bench.args.recalls, len(bench.messages)))
+    return await measure(bench, lambda: bench.recall(victims), len(victims))
+
+
+async def scenario_recall_race(bench: Bench) -> Dict[str, Any]:
+    batch = bench.generate(bench.args.recalls)
+
+    async def race() -> List[float]:
+        latencies: List[float] = []
+
+        async def deliver(message: tuple):
+            message_id, group_id, user_id, segments = message
+            arrival = asyncio.create_task(
+                bench.plugin.on_message(message_event(bench.bot, SELF_ID, message_id, group_id, user_id, segments))
+            )
+            started = time.perf_counter()
+            await bench.plugin.on_recall_notice(recall_event(bench.bot, SELF_ID, message_id, group_id, user_id))
+            latencies.append(time.perf_counter() - started)
+            await arrival
+
+        await asyncio.gather(*(deliver(message) for message in batch))
+        return latencies
+
+    return await measure(bench, race, len(batch))
+
+
+async def scenario_expiry(bench: Bench) -> Dict[str, Any]:
+    await bench.flood(bench.generate(bench.args.messages), bench.args.concurrency)
+
+    async def expire() -> List[float]:
+        started = time.perf_counter()
+        bench.plugin.cache_lifetime = -1
+        bench.plugin._expire_due()
+        await asyncio.sleep(0)
+        return [time.perf_counter() - started]
+
+    return await measure(bench, expire, bench.args.messages)
+
+
+SCENARIOS: Dict[str, Callable[[Bench], Awaitable[Dict[str, Any]]]] = {
+    "flood": scenario_flood,
+    "recall_storm": scenario_recall_storm,
+    "recall_race": scenario_recall_race,
+    "expiry": scenario_expiry,
+}
+
+
+async def measure(bench: Bench, body: Callable[[], Awaitable[List[float]]], operations: int) -> Dict[str, Any]:
+    calls_before = sum(bench.api.calls.values())
+    sent_before = len(bench.api.sent)
+    io_before = read_proc_io()
+    tracemalloc.start()
+    started = time.perf_counter()
+    latencies = await body()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    io_after = read_proc_io()
+    result = {
+        "operations": operations,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_per_s": round(operations / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "peak_alloc_kb": round(peak / 1024, 1),
+        "api_calls": sum(bench.api.calls.values()) - calls_before,
+        "sends": len(bench.api.sent) - sent_before,
+    }
+    for key in ("rchar", "wchar", "read_bytes", "write_bytes"):
+        if key in io_before and key in io_after:
+            result[f"io_{key}_kb"] = round((io_after[key] - io_before[key]) / 1024, 1)
+    return result
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    bench = Bench(args)
+    try:
+        await bench.start()
+        try:
+            return await SCENARIOS[name](bench)
+        finally:
+            await bench.stop()
+    finally:
+        bench.close()
+
+
+def compare(results: Dict[str, Dict[str, Any]], baselines: Dict[str, Dict[str, Any]], tolerance: float) -> bool:
+    ok = True
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            print(f"{name}: no baseline")
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = baseline.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = -change > tolerance if metric in HIGHER_IS_BETTER else change > tolerance
+            ok = ok and not regressed
+            print(f"{name}.{metric}: {old} -> {new} ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--messages", type=int, default=2000, help="messages per flood")
+    parser.add_argument("--recalls", type=int, default=500, help="recalls per storm or race")
+    parser.add_argument("--concurrency", type=int, default=200, help="concurrent message handlers in a flood")
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--image-ratio", type=float, default=0.3, help="fraction of messages carrying an image")
+    parser.add_argument("--media-kb", type=int, default=64, help="size of each fake media file")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="mean latency of every fake API call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability that a fake API call fails")
+    parser.add_argument("--unsupported", action="append", default=[], help="OneBot action the fake bot rejects (repeatable)")
+    parser.add_argument("--forward-format", choices=("merged", "sequential"), default="merged")
+    parser.add_argument("--capture-mode", choices=("eager", "lazy"), default="eager")
+    parser.add_argument("--max-cache-size-mb", type=int, default=0)
+    parser.add_argument("--recall-source", choices=("cache", "get_msg"), default="cache")
+    parser.add_argument("--precache-media-only", action="store_true", help="skip caching text-only messages (get_msg source only)")
+    parser.add_argument("--get-msg-ratio", type=float, default=1.0, help="fraction of messages the fake bot can return from get_msg")
+    parser.add_argument("--ingest-queue-size", type=int, default=100000, help="plugin ingestion queue bound (lower it to exercise load shedding)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline-file", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--compare", action="store_true", help="compare against stored baselines; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression when comparing")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in args.scenario or list(SCENARIOS):
+        results[name] = await run_scenario(name, args)
+        print(f"{name}: {json.dumps(results[name], ensure_ascii=False)}")
+
+    if args.save_baseline:
+        payload = {
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "args": {key: value for key, value in vars(args).items() if key not in ("save_baseline", "compare", "baseline_file")},
+            "results": results,
+        }
+        with open(args.baseline_file, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"baselines written to {args.baseline_file}")
+    if args.compare:
+        try:
+            with open(args.baseline_file, encoding="utf-8") as f:
+                baselines = json.load(f).get("results", {})
+        except FileNotFoundError:
+            print(f"no baseline file at {args.baseline_file}; run with --save-baseline first")
+            return 1
+        if not compare(results, baselines, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,223 @@
+"""Thread-pool file I/O for the RecallGuard cache directory."""
+
+import asyncio
+import errno
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from astrbot.api import logger
+
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+FICLONE = 0x40049409
+LINK_STRATEGIES = ("hardlink", "reflink", "copy_file_range", "copy")
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class MediaTooLarge(Exception):
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"media size {size} exceeds limit {limit}")
+        self.size = size
+        self.limit = limit
+
+
+def check_size(size: int, max_bytes: int):
+    if max_bytes and size > max_bytes:
+        raise MediaTooLarge(size, max_bytes)
+
+
+def _discard_partial(dest_path: str):
+    try:
+        os.remove(dest_path)
+    except OSError:
+        pass
+
+
+def _try_hardlink(source_path: str, dest_path: str) -> bool:
+    try:
+        os.link(source_path, dest_path)
+        return True
+    except OSError:
+        return False
+
+
+def _try_reflink(source_path: str, dest_path: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        _discard_partial(dest_path)
+        return False
+
+
+def _try_copy_file_range(source_path: str, dest_path: str, max_bytes: int = 0) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+            expected = os.fstat(src.fileno()).st_size
+            total = 0
+            while True:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), COPY_CHUNK_SIZE)
+                if copied == 0:
+                    break
+                total += copied
+                check_size(total, max_bytes)
+        if total < expected:
+            raise OSError(errno.EIO, "short copy_file_range")
+        shutil.copystat(source_path, dest_path)
+        return True
+    except MediaTooLarge:
+        _discard_partial(dest_path)
+        raise
+    except OSError:
+        _discard_partial(dest_path)
+        return False
+
+
+def _copy_chunked(source_path: str, dest_path: str, max_bytes: int = 0):
+    try:
+        with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+            total = 0
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                total += len(chunk)
+                check_size(total, max_bytes)
+                dst.write(chunk)
+        shutil.copystat(source_path, dest_path)
+    except BaseException:
+        _discard_partial(dest_path)
+        raise
+
+
+def _link_or_copy(source_path: str, dest_path: str, mode: str, max_bytes: int = 0) -> Optional[str]:
+    try:
+        check_size(os.path.getsize(source_path), max_bytes)
+    except FileNotFoundError:
+        return None
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if mode == "auto":
+        if _try_hardlink(source_path, dest_path):
+            return "hardlink"
+        if _try_reflink(source_path, dest_path):
+            return "reflink"
+        if _try_copy_file_range(source_path, dest_path, max_bytes):
+            return "copy_file_range"
+    _copy_chunked(source_path, dest_path, max_bytes)
+    return "copy"
+
+
+def _remove_files(paths: Iterable[str]) -> int:
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            logger.error(f"RecallGuard failed to delete cache file: path={path}, error={e}")
+    return removed
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return -1
+
+
+def _scan_dir(directory: str) -> List[Tuple[str, int, float]]:
+    files: List[Tuple[str, int, float]] = []
+    if not os.path.isdir(directory):
+        return files
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.path, stat.st_size, stat.st_mtime))
+    return files
+
+
+class CacheIO:
+    def __init__(self, max_workers: int = 4, link_mode: str = "auto"):
+        self.max_workers = max(int(max_workers), 1)
+        self.link_mode = link_mode if link_mode in ("auto", "copy") else "auto"
+        self.strategy_counts: Dict[str, int] = {strategy: 0 for strategy in LINK_STRATEGIES}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="recallguard-io")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self._pending,
+            "completed": self._completed,
+            "strategies": dict(self.strategy_counts),
+        }
+
+    def _submit(self, func: Callable[..., Any], *args: Any):
+        with self._lock:
+            self._pending += 1
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, _future):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    async def copy(self, source_path: str, dest_path: str, max_bytes: int = 0) -> Optional[str]:
+        strategy = await self.run(_link_or_copy, source_path, dest_path, self.link_mode, max_bytes)
+        if strategy:
+            self.strategy_counts[strategy] += 1
+        return strategy
+
+    async def link(self, source_path: str, dest_path: str) -> Optional[str]:
+        if not await self.run(_try_hardlink, source_path, dest_path):
+            return None
+        self.strategy_counts["hardlink"] += 1
+        return "hardlink"
+
+    async def getsize(self, path: str) -> int:
+        return await self.run(_file_size, path)
+
+    def discard(self, paths: Iterable[str]) -> Optional[Future]:
+        paths = list(paths)
+        if not paths:
+            return None
+        return self._submit(_remove_files, paths)
+
+    async def scan(self, directory: str) -> List[Tuple[str, int, float]]:
+        return await self.run(_scan_dir, directory)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
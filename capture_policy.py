@@ -0,0 +1,93 @@
+"""Recall-rate statistics and bounded priority queues for RecallGuard capture scheduling."""
+
+import asyncio
+import heapq
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PRIOR_RECALLS = 0.5
+PRIOR_MESSAGES = 50.0
+
+
+class RecallStats:
+    def __init__(self):
+        self._groups: Dict[str, List[float]] = {}
+        self._users: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {
+            "lazy_queued": 0,
+            "lazy_fetched": 0,
+            "lazy_skipped": 0,
+            "lazy_dropped": 0,
+            "recall_media_ready": 0,
+            "recall_media_fetched": 0,
+            "recall_media_missing": 0,
+        }
+
+    def record_message(self, group_id: str, user_id: str):
+        if group_id:
+            self._groups.setdefault(group_id, [0.0, 0.0])[0] += 1
+        self._users.setdefault(user_id, [0.0, 0.0])[0] += 1
+
+    def record_recall(self, group_id: str, user_id: str):
+        if group_id:
+            self._groups.setdefault(group_id, [0.0, 0.0])[1] += 1
+        self._users.setdefault(user_id, [0.0, 0.0])[1] += 1
+
+    def recall_rate(self, group_id: str, user_id: str) -> float:
+        rates = [_rate(self._users.get(user_id))]
+        if group_id:
+            rates.append(_rate(self._groups.get(group_id)))
+        return max(rates)
+
+    def decay(self, factor: float = 0.5):
+        for table in (self._groups, self._users):
+            for key in list(table):
+                counts = table[key]
+                counts[0] *= factor
+                counts[1] *= factor
+                if counts[0] < 1 and counts[1] < 1:
+                    del table[key]
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def top_groups(self, limit: int = 5) -> List[Tuple[str, float, float, float]]:
+        ranked = sorted(self._groups.items(), key=lambda item: _rate(item[1]), reverse=True)[:limit]
+        return [(group_id, counts[0], counts[1], _rate(counts)) for group_id, counts in ranked]
+
+
+def _rate(counts: Optional[List[float]]) -> float:
+    messages, recalls = counts if counts else (0.0, 0.0)
+    return (recalls + PRIOR_RECALLS) / (messages + PRIOR_MESSAGES)
+
+
+class BoundedPriorityQueue:
+    def __init__(self, maxsize: int):
+        self.maxsize = max(int(maxsize), 1)
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = itertools.count()
+        self._available = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def offer(self, priority: float, item: Any) -> Optional[Any]:
+        entry = (-priority, next(self._seq), item)
+        if len(self._heap) < self.maxsize:
+            heapq.heappush(self._heap, entry)
+            self._available.set()
+            return None
+        lowest = max(self._heap)
+        if entry >= lowest:
+            return item
+        self._heap.remove(lowest)
+        heapq.heapify(self._heap)
+        heapq.heappush(self._heap, entry)
+        return lowest[2]
+
+    async def get(self) -> Any:
+        while not self._heap:
+            self._available.clear()
+            await self._available.wait()
+        return heapq.heappop(self._heap)[2]
@@ -1,11 +1,63 @@
 """Low-level OneBot/NapCat sending helpers for RecallGuard."""
 
 import os
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from astrbot.api import logger
 
 
+CAPABILITY_TTL_SECONDS = 600
+UNSUPPORTED_RETCODES = {1404}
+UNSUPPORTED_MARKERS = ("unsupported", "not support", "不支持")
+
+
+def is_unsupported_error(error: Exception) -> bool:
+    if type(error).__name__ == "ApiNotAvailable":
+        return True
+    result = getattr(error, "result", None)
+    if isinstance(result, dict) and result.get("retcode") in UNSUPPORTED_RETCODES:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in UNSUPPORTED_MARKERS)
+
+
+class SendCapabilities:
+    def __init__(self, ttl_seconds: float = CAPABILITY_TTL_SECONDS):
+        self.ttl_seconds = max(float(ttl_seconds), 0)
+        self._unsupported: Dict[Tuple[Any, str], float] = {}
+
+    def configure(self, ttl_seconds: float):
+        self.ttl_seconds = max(float(ttl_seconds), 0)
+
+    def unsupported(self, bot_key: Any, action: str) -> bool:
+        marked = self._unsupported.get((bot_key, action))
+        if marked is None:
+            return False
+        if time.monotonic() - marked > self.ttl_seconds:
+            del self._unsupported[(bot_key, action)]
+            return False
+        return True
+
+    def order(self, bot_key: Any, actions: List[str]) -> List[str]:
+        return sorted(actions, key=lambda action: self.unsupported(bot_key, action))
+
+    def mark(self, bot_key: Any, action: str, supported: bool):
+        if supported:
+            if self._unsupported.pop((bot_key, action), None) is not None:
+                logger.info(f"[Forwarder] send capability {action} for {bot_key}: supported again")
+        elif (bot_key, action) not in self._unsupported:
+            logger.info(f"[Forwarder] send capability {action} for {bot_key}: unsupported")
+            self._unsupported[(bot_key, action)] = time.monotonic()
+
+
+CAPABILITIES = SendCapabilities()
+
+
+def bot_key(bot_client: Any, bot_id: str = "") -> Any:
+    return str(bot_id) if bot_id else id(bot_client)
+
+
 def _file_uri(file_path: str) -> str:
     return f"file:///{os.path.abspath(file_path).replace(os.sep, '/')}"
 
@@ -46,25 +98,29 @@ async def send_message_by_api(bot_client: Any, session_id: str, segments: List[D
         return False
 
 
-async def send_forward_message_by_api(bot_client: Any, session_id: str, nodes: List[Dict]) -> bool:
+async def send_forward_message_by_api(bot_client: Any, session_id: str, nodes: List[Dict], bot_id: str = "") -> bool:
     target_type, target_id = parse_session_id(session_id)
     if not target_type or target_id is None:
         logger.error(f"[Forwarder] invalid forward target session: {session_id}")
         return False
 
-    actions: List[tuple[str, Dict[str, Any]]] = []
+    actions: Dict[str, Dict[str, Any]] = {}
     if target_type == "group":
-        actions.append(("send_group_forward_msg", {"group_id": target_id, "messages": nodes}))
+        actions["send_group_forward_msg"] = {"group_id": target_id, "messages": nodes}
     else:
-        actions.append(("send_private_forward_msg", {"user_id": target_id, "messages": nodes}))
-    actions.append(("send_forward_msg", {"messages": nodes}))
+        actions["send_private_forward_msg"] = {"user_id": target_id, "messages": nodes}
+    actions["send_forward_msg"] = {"messages": nodes}
 
-    for action, params in actions:
+    key = bot_key(bot_client, bot_id)
+    for action in CAPABILITIES.order(key, list(actions)):
         try:
-            await call_action(bot_client, action, **params)
+            await call_action(bot_client, action, **actions[action])
+            CAPABILITIES.mark(key, action, True)
             logger.info(f"[Forwarder] sent forward message via {action} to {session_id}")
             return True
         except Exception as e:
+            if is_unsupported_error(e):
+                CAPABILITIES.mark(key, action, False)
             logger.warning(f"[Forwarder] {action} failed for {session_id}: {e}")
     return False
 
@@ -0,0 +1,91 @@
+"""Learned ordering of media fetch API variants per bot, action and segment type."""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+PRUNE_MIN_ATTEMPTS = 8
+LATENCY_SMOOTHING = 0.2
+
+
+def variant_name(params: Dict[str, Any]) -> str:
+    return "+".join(f"{key}={value}" if key == "out_format" else key for key, value in params.items())
+
+
+class VariantStats:
+    __slots__ = ("successes", "failures", "latency")
+
+    def __init__(self):
+        self.successes = 0.0
+        self.failures = 0.0
+        self.latency = 0.0
+
+    @property
+    def attempts(self) -> float:
+        return self.successes + self.failures
+
+    @property
+    def success_rate(self) -> float:
+        return (self.successes + 1) / (self.attempts + 2)
+
+
+class FetchStrategyTable:
+    def __init__(self, prune_after: int = PRUNE_MIN_ATTEMPTS):
+        self.prune_after = max(int(prune_after), 0)
+        self._stats: Dict[Tuple[str, str, str], Dict[str, VariantStats]] = {}
+        self.pruned_calls = 0
+
+    def order(
+        self,
+        bot_id: str,
+        segment_type: str,
+        candidates: Iterable[Tuple[str, Dict[str, Any]]],
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        ranked = []
+        for index, (action, params) in enumerate(candidates):
+            stats = self._stats.get((bot_id, action, segment_type), {}).get(variant_name(params))
+            if stats is None:
+                ranked.append((0.5, 0.0, index, action, params, None))
+            else:
+                ranked.append((stats.success_rate, stats.latency, index, action, params, stats))
+        ranked.sort(key=lambda item: (-item[0], item[1], item[2]))
+        if not any(item[5] is not None and item[5].successes > 0 for item in ranked):
+            return [(item[3], item[4]) for item in ranked]
+
+        ordered = []
+        for _, _, _, action, params, stats in ranked:
+            if self.prune_after and stats is not None and stats.successes == 0 and stats.failures >= self.prune_after:
+                self.pruned_calls += 1
+                continue
+            ordered.append((action, params))
+        return ordered
+
+    def record(self, bot_id: str, action: str, segment_type: str, params: Dict[str, Any], ok: bool, elapsed: float):
+        variants = self._stats.setdefault((bot_id, action, segment_type), {})
+        stats = variants.get(variant_name(params))
+        if stats is None:
+            stats = variants[variant_name(params)] = VariantStats()
+        if ok:
+            stats.latency = elapsed if stats.successes == 0 else stats.latency + LATENCY_SMOOTHING * (elapsed - stats.latency)
+            stats.successes += 1
+        else:
+            stats.failures += 1
+
+    def decay(self, factor: float = 0.5):
+        for key in list(self._stats):
+            variants = self._stats[key]
+            for name in list(variants):
+                stats = variants[name]
+                stats.successes *= factor
+                stats.failures *= factor
+                if stats.attempts < 1:
+                    del variants[name]
+            if not variants:
+                del self._stats[key]
+
+    def table(self) -> List[Tuple[str, str, str, str, VariantStats]]:
+        rows = []
+        for (bot_id, action, segment_type), variants in sorted(self._stats.items()):
+            ranked = sorted(variants.items(), key=lambda item: (-item[1].success_rate, item[1].latency))
+            for name, stats in ranked:
+                rows.append((bot_id, action, segment_type, name, stats))
+        return rows
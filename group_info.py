@@ -0,0 +1,62 @@
+"""Group name lookups for RecallGuard with TTL caching and request coalescing."""
+
+import asyncio
+import time
+from typing import Any, Dict, Tuple
+
+from aiocqhttp.exceptions import ActionFailed
+from astrbot.api import logger
+
+
+FAILURE_TTL_SECONDS = 60
+
+
+class GroupNameCache:
+    def __init__(self, ttl_seconds: float = 3600):
+        self.ttl_seconds = max(float(ttl_seconds), 0)
+        self._names: Dict[str, Tuple[str, float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.fetches = 0
+
+    def peek(self, group_id: str) -> str:
+        cached = self._names.get(group_id)
+        return cached[0] if cached else ""
+
+    async def get(self, bot_client: Any, group_id: str) -> str:
+        cached = self._names.get(group_id)
+        if cached and cached[1] > time.monotonic():
+            self.hits += 1
+            return cached[0]
+        inflight = self._inflight.get(group_id)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[group_id] = future
+        name = cached[0] if cached else ""
+        try:
+            self.fetches += 1
+            fetched = await self._fetch(bot_client, group_id)
+            if fetched is None:
+                self._names[group_id] = (name, time.monotonic() + min(FAILURE_TTL_SECONDS, self.ttl_seconds))
+            else:
+                name = fetched
+                self._names[group_id] = (name, time.monotonic() + self.ttl_seconds)
+        finally:
+            self._inflight.pop(group_id, None)
+            future.set_result(name)
+        return name
+
+    async def _fetch(self, bot_client: Any, group_id: str):
+        try:
+            group_info = await bot_client.api.call_action("get_group_info", group_id=int(group_id))
+            if isinstance(group_info, dict):
+                return group_info.get("group_name", "") or ""
+            return ""
+        except ActionFailed as e:
+            logger.warning(f"RecallGuard failed to fetch group name: group_id={group_id}, error={e}")
+        except Exception as e:
+            logger.error(f"RecallGuard unexpected group name error: group_id={group_id}, error={e}", exc_info=True)
+        return None
@@ -2,9 +2,8 @@ import asyncio
 import copy
 import json
 import os
-import shutil
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from aiocqhttp.exceptions import ActionFailed
 from astrbot.api import logger
@@ -21,13 +20,33 @@ from astrbot.api.star import Context, Star, register
 from astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event import AiocqhttpMessageEvent
 
 from . import cqhttp_forwarder
-
-
-MESSAGE_CACHE: Dict[str, Dict[str, Any]] = {}
+from .cache_io import LINK_STRATEGIES, CacheIO, MediaTooLarge, check_size
+from .capture_policy import BoundedPriorityQueue, RecallStats
+from .fetch_strategy import FetchStrategyTable
+from .group_info import GroupNameCache
+from .media_store import MediaStore
+from .message_cache import CacheRecord, MessageCache
+from .metrics import Metrics
+from .monitor_policy import MonitorPolicy
+from .outbound import DEFAULT_PROMPT_TEMPLATE, OutboundPayload, PromptTemplate
+from .persistent_cache import PersistentCache
+from .rate_limit import TokenBucket
+
+
+MESSAGE_CACHE = MessageCache()
 DIRECT_SEGMENT_TYPES = {"text", "image", "record", "video", "file", "face", "at", "reply", "json", "xml"}
 MEDIA_ACTIONS = {"image": ("get_image",), "record": ("get_record",), "video": ("get_file",), "file": ("get_file",)}
 SUPPORTED_SUMMARY_TYPES = {"forward", "node", "share", "location", "music", "markdown", "light_app", "shake", "poke"}
-VIDEO_SIZE_LIMIT = 100 * 1024 * 1024
+MEDIA_SIZE_LIMIT_OPTIONS = {
+    "image": ("max_image_size_mb", 0),
+    "record": ("max_record_size_mb", 0),
+    "video": ("max_video_size_mb", 100),
+    "file": ("max_file_size_mb", 0),
+}
+MEDIA_TYPE_LABELS = {"image": "图片", "record": "语音", "video": "视频", "file": "文件"}
+EXPIRY_RESOLUTION_SECONDS = 1.0
+RECALL_STATS_HALF_LIFE_SECONDS = 6 * 3600
+FETCH_STATS_HALF_LIFE_SECONDS = 24 * 3600
 
 
 @register(
@@ -42,16 +61,106 @@ class RecallGuardPlugin(Star):
         super().__init__(context)
         self.config = config or {}
         self.running = True
-        self.cache_dir = self.config.get("cleanup_options", {}).get("cache_dir", "/shared/recall_guard_cache")
+        self.metrics = Metrics()
+        self.inflight_preparations = 0
+        conf_cleanup = self.config.get("cleanup_options", {})
+        self.cache_dir = conf_cleanup.get("cache_dir", "/shared/recall_guard_cache")
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.keep_raw_event = bool(conf_cleanup.get("keep_raw_event", False))
+        MESSAGE_CACHE.configure(
+            conf_cleanup.get("max_cache_entries", 0),
+            conf_cleanup.get("max_cache_memory_mb", 0) * 1024 * 1024,
+            self._on_cache_evict,
+        )
+        conf_options = self.config.get("monitoring_options", {})
+        self.media_size_limits = {
+            segment_type: int(max(float(conf_options.get(option, default)), 0) * 1024 * 1024)
+            for segment_type, (option, default) in MEDIA_SIZE_LIMIT_OPTIONS.items()
+        }
+        conf_perf = self.config.get("performance_options", {})
+        self.recall_wait_timeout = max(float(conf_perf.get("recall_wait_timeout_seconds", 15)), 0)
+        self.media_semaphore = asyncio.Semaphore(max(int(conf_perf.get("max_concurrent_media_fetches", 8)), 1))
+        self.io = CacheIO(conf_perf.get("io_workers", 4), conf_perf.get("media_link_mode", "auto"))
+        self.media_store = MediaStore(self.cache_dir, self.io)
+        MESSAGE_CACHE.configure_quotas(
+            conf_cleanup.get("max_group_cache_entries", 0),
+            conf_cleanup.get("max_group_media_mb", 0) * 1024 * 1024,
+            conf_cleanup.get("max_user_cache_entries", 0),
+            conf_cleanup.get("max_user_media_mb", 0) * 1024 * 1024,
+            self.media_store.file_size,
+        )
+        self.fetch_strategy = FetchStrategyTable(conf_perf.get("fetch_prune_after", 8))
+        self.group_names = GroupNameCache(conf_perf.get("group_name_ttl_seconds", 3600))
+        self.resolve_group_name_on_recall = bool(conf_perf.get("resolve_group_name_on_recall", False))
+        self.recall_stats = RecallStats()
+        self.recall_from_get_msg = conf_perf.get("recall_source", "cache") == "get_msg"
+        self.precache_media_only = self.recall_from_get_msg and bool(conf_perf.get("precache_media_only", False))
+        self.lazy_capture = conf_perf.get("media_capture_mode", "eager") == "lazy"
+        self.lazy_skip_threshold = max(float(conf_perf.get("lazy_skip_threshold", 0)), 0)
+        self.lazy_queue = BoundedPriorityQueue(conf_perf.get("lazy_fetch_queue_size", 200))
+        self.lazy_workers: List[asyncio.Task] = []
+        if self.lazy_capture:
+            self.lazy_workers = [
+                asyncio.create_task(self._lazy_fetch_worker())
+                for _ in range(max(int(conf_perf.get("lazy_fetch_workers", 2)), 1))
+            ]
+        self.ingest_queue = BoundedPriorityQueue(conf_perf.get("ingest_queue_size", 1000))
+        self.shed_media_ratio = max(float(conf_perf.get("shed_media_ratio", 0.5)), 0)
+        self.shed_text_ratio = max(float(conf_perf.get("shed_text_ratio", 0.8)), 0)
+        self.shed_stage = 0
+        self.ingest_workers = [
+            asyncio.create_task(self._ingest_worker())
+            for _ in range(max(int(conf_perf.get("ingest_workers", 8)), 1))
+        ]
+        conf_fwd = self.config.get("forwarding_options", {})
+        self.send_semaphore = asyncio.Semaphore(max(int(conf_fwd.get("max_concurrent_targets", 4)), 1))
+        self.target_rate = max(float(conf_fwd.get("target_rate_per_minute", 20)), 0) / 60
+        self.target_burst = max(int(conf_fwd.get("target_burst", 5)), 1)
+        self.target_buckets: Dict[str, TokenBucket] = {}
+        self.prompt_template = PromptTemplate(conf_fwd.get("forward_message_text", DEFAULT_PROMPT_TEMPLATE))
+        cqhttp_forwarder.CAPABILITIES.configure(conf_fwd.get("capability_reprobe_seconds", 600))
+        self.coalesce_window = max(float(conf_fwd.get("coalesce_window_ms", 0)), 0) / 1000
+        self.coalesce_max_batch = max(int(conf_fwd.get("coalesce_max_batch", 10)), 1)
+        self.coalesce_buffers: Dict[Tuple[str, ...], List[CacheRecord]] = {}
+        self.coalesce_timers: Dict[Tuple[str, ...], asyncio.Task] = {}
+        self.coalesce_bots: Dict[Tuple[str, ...], Tuple[Any, str]] = {}
+        self.persistent_cache: Optional[PersistentCache] = None
+        self.cold_refs_loaded = True
+        if conf_cleanup.get("persist_cache", False):
+            db_path = conf_cleanup.get("persist_db_path") or f"{self.cache_dir.rstrip('/')}.sqlite3"
+            self.persistent_cache = PersistentCache(db_path, conf_cleanup.get("persist_flush_interval_seconds", 1.0))
+            self.cold_refs_loaded = False
+            asyncio.create_task(self._start_persistent_cache())
+        MESSAGE_CACHE.journal = self.persistent_cache
+        self.max_cache_size_mb = conf_cleanup.get("max_cache_size_mb", 1024)
+        asyncio.create_task(self._load_disk_ledger())
+        self.cache_lifetime = conf_cleanup.get("cache_lifetime_seconds", 86400)
+        self.cleanup_interval = conf_cleanup.get("cleanup_interval_seconds", 600)
         self.cleanup_task = asyncio.create_task(self._periodic_cleanup())
-        self._update_monitored_groups_set()
+        self.expiry_task = asyncio.create_task(self._expiry_loop())
+        self.policy = MonitorPolicy.from_config(self.config)
+        self.metrics.counter_source("group_name_cache_hits", lambda: self.group_names.hits)
+        self.metrics.counter_source("group_name_fetches", lambda: self.group_names.fetches)
+        self.metrics.counter_source("media_dedup_hits", lambda: self.media_store.dedup_hits)
+        for strategy in LINK_STRATEGIES:
+            self.metrics.counter_source(f"media_store_{strategy}", lambda strategy=strategy: self.io.strategy_counts[strategy])
+        self.metrics.gauge("cache_entries", lambda: len(MESSAGE_CACHE))
+        self.metrics.gauge("cache_memory_bytes", lambda: MESSAGE_CACHE.total_bytes)
+        self.metrics.gauge("media_disk_bytes", lambda: self.media_store.total_bytes)
+        self.metrics.gauge("media_files", lambda: self.media_store.file_count)
+        self.metrics.gauge("inflight_preparations", lambda: self.inflight_preparations)
+        self.metrics.gauge("io_queue_depth", lambda: self.io.queue_depth)
+        self.metrics.gauge("lazy_queue_length", lambda: len(self.lazy_queue))
+        self.metrics.gauge("ingest_queue_length", lambda: len(self.ingest_queue))
+        self.metrics.gauge("shed_stage", lambda: self.shed_stage)
+        self.metrics_dump_path = conf_perf.get("metrics_dump_path", "")
+        self.metrics_task = None
+        if self.metrics_dump_path:
+            self.metrics_task = asyncio.create_task(
+                self._dump_metrics_loop(max(float(conf_perf.get("metrics_dump_interval_seconds", 60)), 1))
+            )
         logger.info("RecallGuard v2.1.0 NapCat adapter loaded.")
 
-    def _update_monitored_groups_set(self):
-        conf_group_list = self.config.get("group_monitoring", {}).get("monitored_groups", [])
-        self.monitored_groups_set = {str(g).split(":")[-1] for g in conf_group_list if str(g).strip()}
-
     def _get_cache_scope(self, group_id: str, user_id: str) -> str:
         return f"group:{group_id}" if group_id else f"private:{user_id}"
 
@@ -65,15 +174,11 @@ class RecallGuardPlugin(Star):
             str(event.get_sender_id() or ""),
         )
 
-    def _safe_cache_name(self, cache_key: str, suffix: str = "") -> str:
-        safe = cache_key.replace(":", "_").replace("/", "_").replace("\\", "_")
-        return f"{safe}{suffix}"
-
     def _get_recall_cache_keys(self, raw_event: dict, event: AstrMessageEvent, message_id: str) -> List[str]:
         group_id = str(raw_event.get("group_id") or event.get_group_id() or "")
         user_id = str(raw_event.get("user_id") or event.get_sender_id() or "")
         keys = [self._get_cache_key(message_id, group_id, user_id)]
-        keys.extend(key for key in MESSAGE_CACHE if key.endswith(f":{message_id}") and key not in keys)
+        keys.extend(key for key in MESSAGE_CACHE.keys_for_message(message_id) if key not in keys)
         if message_id not in keys:
             keys.append(message_id)
         return keys
@@ -82,71 +187,201 @@ class RecallGuardPlugin(Star):
         self.running = False
         if self.cleanup_task:
             self.cleanup_task.cancel()
+        if self.expiry_task:
+            self.expiry_task.cancel()
+        if self.metrics_task:
+            self.metrics_task.cancel()
+        for worker in self.lazy_workers + self.ingest_workers:
+            worker.cancel()
+        for target_sessions, (bot_client, bot_self_id) in list(self.coalesce_bots.items()):
+            try:
+                await self._flush_coalesced(target_sessions, bot_client, bot_self_id)
+            except Exception as e:
+                logger.error(f"RecallGuard failed to flush coalesced recalls on shutdown: {e}", exc_info=True)
+        if self.persistent_cache:
+            MESSAGE_CACHE.journal = None
+            await self.persistent_cache.close()
+        self.io.shutdown()
         logger.info("RecallGuard v2.1.0 stopped.")
 
+    async def _start_persistent_cache(self):
+        try:
+            await self.persistent_cache.open()
+            referenced = await self.persistent_cache.referenced_files()
+            for path in referenced:
+                self.media_store.acquire(path)
+            logger.info(f"RecallGuard persistent cache opened: path={self.persistent_cache.db_path}, restored_file_refs={len(referenced)}")
+        except Exception as e:
+            logger.error(f"RecallGuard failed to open persistent cache: {e}", exc_info=True)
+            if self.persistent_cache.failed and MESSAGE_CACHE.journal is self.persistent_cache:
+                MESSAGE_CACHE.journal = None
+        finally:
+            self.cold_refs_loaded = True
+
     @filter.event_message_type(filter.EventMessageType.ALL)
     async def on_message(self, event: AstrMessageEvent):
         raw_event = getattr(event.message_obj, "raw_message", None)
         if isinstance(raw_event, dict) and raw_event.get("post_type") == "notice":
             return
 
-        self._update_monitored_groups_set()
         sender_id = str(event.get_sender_id())
         group_id = str(event.get_group_id() or "")
 
-        if not self._should_monitor(sender_id, group_id):
+        if not self.policy.should_monitor(sender_id, group_id):
             return
 
         message_id = str(event.message_obj.message_id)
         cache_key = self._get_cache_key(message_id, group_id, sender_id)
-        segments = self._extract_raw_segments(event)
-        segments = self._filter_segments_by_config(segments)
+        with self.metrics.timer("extract"):
+            segments = self._extract_raw_segments(event)
+        with self.metrics.timer("filter"):
+            segments = self._filter_segments_by_config(segments)
         if not segments:
             logger.info(f"RecallGuard ignored message without monitored segments: message_id={message_id}, cache_key={cache_key}")
             return
 
-        MESSAGE_CACHE[cache_key] = {
-            "message_id": message_id,
-            "cache_key": cache_key,
-            "sender_id": sender_id,
-            "sender_name": event.get_sender_name(),
-            "group_id": group_id,
-            "group_name": "",
-            "timestamp": time.time(),
-            "message_type": self._describe_segment_types(segments),
-            "segments": segments,
-            "raw_event": self._safe_copy(raw_event),
-            "preparing": True,
-        }
-        cached_segments = await self._prepare_cache_segments(event, cache_key, segments)
+        self.recall_stats.record_message(group_id, sender_id)
+        if self.precache_media_only and not any(segment.get("type") in MEDIA_ACTIONS for segment in segments):
+            self.metrics.inc("precache_skipped")
+            return
+        priority = 1.0 if sender_id in self.policy.monitored_users else 0.0
+        self._update_shed_stage()
+        if not priority and self.shed_stage >= 2:
+            self.metrics.inc("shed_rejected")
+            logger.debug(f"RecallGuard shed low-priority message under load: message_id={message_id}, cache_key={cache_key}")
+            return
+
+        record = CacheRecord(
+            message_id=message_id,
+            cache_key=cache_key,
+            sender_id=sender_id,
+            sender_name=event.get_sender_name(),
+            group_id=group_id,
+            timestamp=time.time(),
+            segments=segments,
+            raw_event=self._safe_copy(raw_event) if self.keep_raw_event else None,
+            preparing=True,
+            ready=asyncio.Event(),
+        )
+        MESSAGE_CACHE.put(cache_key, record)
+        self.metrics.inc("cache_inserts")
+        dropped = self.ingest_queue.offer(priority, (event, record))
+        if dropped is not None:
+            _, dropped_record = dropped
+            if MESSAGE_CACHE.get(dropped_record.cache_key) is dropped_record:
+                MESSAGE_CACHE.pop(dropped_record.cache_key)
+            dropped_record.ready.set()
+            self.metrics.inc("shed_evicted")
+            logger.debug(f"RecallGuard ingestion queue full, dropped message: cache_key={dropped_record.cache_key}")
+
+    def _update_shed_stage(self):
+        fill = len(self.ingest_queue) / self.ingest_queue.maxsize
+        stage = 3 if fill >= 1 else 2 if fill >= self.shed_text_ratio else 1 if fill >= self.shed_media_ratio else 0
+        if stage != self.shed_stage:
+            counters = self.metrics.counters
+            logger.warning(
+                f"RecallGuard ingestion load shedding stage {self.shed_stage} -> {stage}: "
+                f"queue={len(self.ingest_queue)}/{self.ingest_queue.maxsize}, shed_media={counters.get('shed_media', 0)}, "
+                f"shed_rejected={counters.get('shed_rejected', 0)}, shed_evicted={counters.get('shed_evicted', 0)}"
+            )
+            self.shed_stage = stage
+
+    async def _ingest_worker(self):
+        while self.running:
+            event, record = await self.ingest_queue.get()
+            try:
+                if MESSAGE_CACHE.get(record.cache_key) is not record:
+                    continue
+                self._update_shed_stage()
+                fetch_media = not self.lazy_capture
+                if fetch_media and self.shed_stage >= 1 and record.sender_id not in self.policy.monitored_users:
+                    if self._has_segment_type(record, set(MEDIA_ACTIONS)):
+                        fetch_media = False
+                        self.metrics.inc("shed_media")
+                self.inflight_preparations += 1
+                try:
+                    await self._finish_cache_entry(event, record, fetch_media)
+                finally:
+                    self.inflight_preparations -= 1
+            except Exception as e:
+                logger.error(f"RecallGuard failed to prepare cache entry: cache_key={record.cache_key}, error={e}", exc_info=True)
+            finally:
+                record.ready.set()
+
+    async def _finish_cache_entry(self, event: AstrMessageEvent, record: CacheRecord, fetch_media: bool = True):
+        cache_key = record.cache_key
+        cached_segments = await self._prepare_cache_segments(event, cache_key, record.segments, fetch_media=fetch_media)
         if not cached_segments:
-            MESSAGE_CACHE.pop(cache_key, None)
-            logger.warning(f"RecallGuard failed to cache any segment: message_id={message_id}, cache_key={cache_key}")
+            if MESSAGE_CACHE.get(cache_key) is record:
+                MESSAGE_CACHE.pop(cache_key)
+            logger.warning(f"RecallGuard failed to cache any segment: message_id={record.message_id}, cache_key={cache_key}")
             return
 
-        if cache_key not in MESSAGE_CACHE:
-            self._remove_cached_files({"segments": cached_segments})
-            logger.info(f"RecallGuard media prepared after recall handled: message_id={message_id}, cache_key={cache_key}")
+        if MESSAGE_CACHE.get(cache_key) is record:
+            if self.resolve_group_name_on_recall:
+                record.group_name = self.group_names.peek(record.group_id)
+            else:
+                record.group_name = await self._get_group_name(event, record.group_id)
+        if MESSAGE_CACHE.get(cache_key) is not record:
+            self._remove_cached_files(cached_segments)
+            logger.info(f"RecallGuard media prepared after recall handled: message_id={record.message_id}, cache_key={cache_key}")
             return
 
-        group_name = await self._get_group_name(event, group_id)
-        MESSAGE_CACHE[cache_key] = {
-            "message_id": message_id,
-            "cache_key": cache_key,
-            "sender_id": sender_id,
-            "sender_name": event.get_sender_name(),
-            "group_id": group_id,
-            "group_name": group_name,
-            "timestamp": time.time(),
-            "message_type": self._describe_segment_types(cached_segments),
-            "segments": cached_segments,
-            "raw_event": self._safe_copy(raw_event),
-            "preparing": False,
-        }
+        record.segments = cached_segments
+        record.preparing = False
+        record.media_pending = not fetch_media and self._has_segment_type(record, set(MEDIA_ACTIONS))
+        MESSAGE_CACHE.put(cache_key, record)
         logger.info(
-            f"RecallGuard cached message: message_id={message_id}, cache_key={cache_key}, "
-            f"segments={self._describe_segment_types(cached_segments)}"
+            f"RecallGuard cached message: message_id={record.message_id}, cache_key={cache_key}, "
+            f"segments={record.message_type}"
         )
+        if record.media_pending and self.lazy_capture:
+            self._schedule_lazy_fetch(event, record)
+
+    def _schedule_lazy_fetch(self, event: AstrMessageEvent, record: CacheRecord):
+        recall_rate = self.recall_stats.recall_rate(record.group_id, record.sender_id)
+        if recall_rate < self.lazy_skip_threshold:
+            self.recall_stats.count("lazy_skipped")
+            return
+        job = (event, record)
+        dropped = self.lazy_queue.offer(recall_rate, job)
+        if dropped is not job:
+            self.recall_stats.count("lazy_queued")
+        if dropped is not None:
+            self.recall_stats.count("lazy_dropped")
+
+    async def _lazy_fetch_worker(self):
+        while self.running:
+            event, record = await self.lazy_queue.get()
+            if MESSAGE_CACHE.get(record.cache_key) is not record or not record.media_pending:
+                continue
+            try:
+                segments = await self._prepare_cache_segments(event, record.cache_key, record.segments)
+            except Exception as e:
+                logger.error(f"RecallGuard lazy media fetch failed: cache_key={record.cache_key}, error={e}", exc_info=True)
+                continue
+            if MESSAGE_CACHE.get(record.cache_key) is not record or not record.media_pending:
+                self._remove_cached_files(segments)
+                continue
+            record.segments = segments
+            record.media_pending = False
+            MESSAGE_CACHE.put(record.cache_key, record)
+            self.recall_stats.count("lazy_fetched")
+
+    async def _complete_recalled_media(self, event: AstrMessageEvent, cached_info: CacheRecord):
+        if not self._has_segment_type(cached_info, set(MEDIA_ACTIONS)):
+            return
+        if cached_info.media_pending:
+            cached_info.segments = await self._prepare_cache_segments(event, cached_info.cache_key, cached_info.segments)
+            cached_info.media_pending = False
+            self.recall_stats.count("recall_media_fetched")
+        else:
+            self.recall_stats.count("recall_media_ready")
+        if any(
+            segment.get("type") in MEDIA_ACTIONS and not segment.get("data", {}).get("local_path")
+            for segment in cached_info.segments
+        ):
+            self.recall_stats.count("recall_media_missing")
 
     @filter.event_message_type(filter.EventMessageType.ALL, priority=10)
     async def on_recall_notice(self, event: AstrMessageEvent):
@@ -162,43 +397,165 @@ class RecallGuardPlugin(Star):
 
         message_id = str(raw_event.get("message_id") or "")
         cache_keys = self._get_recall_cache_keys(raw_event, event, message_id)
-        cached_info = await self._wait_and_pop_cached_info(cache_keys, message_id)
+        cached_info = None
+        get_msg_failed = False
+        if self.recall_from_get_msg and message_id:
+            sender_id = str(raw_event.get("user_id") or "")
+            if sender_id and not self.policy.should_monitor(sender_id, str(raw_event.get("group_id") or "")):
+                logger.debug(f"RecallGuard ignored recall outside monitoring scope: message_id={message_id}")
+                return
+            cached_info = await self._recall_from_get_msg(event, raw_event, message_id, cache_keys)
+            if cached_info is not None and not cached_info.segments:
+                logger.info(f"RecallGuard recalled message has no monitored segments: message_id={message_id}")
+                return
+            get_msg_failed = cached_info is None
+        if not cached_info:
+            cached_info = await self._wait_and_pop_cached_info(cache_keys, message_id)
+            if get_msg_failed:
+                self.metrics.inc("get_msg_fallback_hits" if cached_info else "get_msg_fallback_misses")
         if not cached_info:
+            self.metrics.inc("recall_misses")
             logger.warning(
                 f"RecallGuard recall miss: message_id={message_id}, keys={cache_keys}, "
                 f"notice_type={raw_event.get('notice_type')}, cache_size={len(MESSAGE_CACHE)}"
             )
             return
 
+        self.metrics.inc("recall_hits")
         logger.info(
-            f"RecallGuard recall hit: message_id={message_id}, cache_key={cached_info.get('cache_key')}, "
-            f"segments={cached_info.get('message_type')}"
+            f"RecallGuard recall hit: message_id={message_id}, cache_key={cached_info.cache_key}, "
+            f"segments={cached_info.message_type}"
         )
+        self.recall_stats.record_recall(cached_info.group_id, cached_info.sender_id)
+        await self._complete_recalled_media(event, cached_info)
+        if not cached_info.group_name and cached_info.group_id:
+            cached_info.group_name = await self._get_group_name(event, cached_info.group_id)
         await self._forward_recalled_content(cached_info, event.bot, event.get_self_id())
 
-    def _should_monitor(self, sender_id: str, group_id: str) -> bool:
-        conf_user = self.config.get("user_monitoring", {})
-        blacklist_users = {str(u) for u in conf_user.get("blacklist_users", [])}
-        monitored_users = {str(u) for u in conf_user.get("monitored_users", [])}
-        if sender_id in blacklist_users:
-            return False
-        if sender_id in monitored_users:
-            return True
-        group_conf = self.config.get("group_monitoring", {})
-        return bool(group_conf.get("enable_group_monitoring") and group_id and group_id in self.monitored_groups_set)
+    async def _recall_from_get_msg(
+        self, event: AiocqhttpMessageEvent, raw_event: dict, message_id: str, cache_keys: List[str]
+    ) -> Optional[CacheRecord]:
+        sender_id = str(raw_event.get("user_id") or "")
+        group_id = str(raw_event.get("group_id") or "")
+        try:
+            with self.metrics.timer("get_msg"):
+                response = await event.bot.api.call_action(
+                    "get_msg", message_id=int(message_id) if message_id.lstrip("-").isdigit() else message_id
+                )
+            record = self._record_from_get_msg(response, message_id, sender_id, group_id)
+        except Exception as e:
+            self.metrics.inc("get_msg_failures")
+            logger.info(f"RecallGuard get_msg failed, falling back to cache: message_id={message_id}, error={e}")
+            return None
+        if record is None:
+            self.metrics.inc("get_msg_failures")
+            logger.info(f"RecallGuard get_msg returned no message, falling back to cache: message_id={message_id}")
+            return None
+        if not record.segments:
+            self.metrics.inc("get_msg_filtered")
+            return record
+
+        self.metrics.inc("get_msg_hits")
+        if self._has_segment_type(record, set(MEDIA_ACTIONS)) and self._find_cached_info(cache_keys):
+            cached_info = await self._wait_and_pop_cached_info(cache_keys, message_id)
+            if cached_info:
+                return cached_info
+        for cache_key in cache_keys:
+            stale = MESSAGE_CACHE.pop(cache_key)
+            if stale and not stale.preparing:
+                self._remove_cached_files(stale.segments)
+        record.media_pending = self._has_segment_type(record, set(MEDIA_ACTIONS))
+        logger.info(f"RecallGuard recall served by get_msg: message_id={message_id}, segments={record.message_type}")
+        return record
+
+    def _record_from_get_msg(self, response: Any, message_id: str, sender_id: str, group_id: str) -> Optional[CacheRecord]:
+        if not isinstance(response, dict):
+            return None
+        message = response.get("message")
+        if isinstance(message, list):
+            segments = [self._normalize_segment(segment) for segment in message if isinstance(segment, dict)]
+        elif isinstance(message, str) and message:
+            segments = [cqhttp_forwarder.text_to_segment(message)]
+        else:
+            return None
+        if not segments:
+            return None
+        segments = self._filter_segments_by_config(segments)
+        sender = response.get("sender") if isinstance(response.get("sender"), dict) else {}
+        sender_id = str(sender.get("user_id") or response.get("user_id") or sender_id)
+        group_id = str(response.get("group_id") or group_id or "")
+        return CacheRecord(
+            message_id=message_id,
+            cache_key=self._get_cache_key(message_id, group_id, sender_id),
+            sender_id=sender_id,
+            sender_name=str(sender.get("card") or sender.get("nickname") or sender_id),
+            group_id=group_id,
+            timestamp=float(response.get("time") or time.time()),
+            segments=segments,
+        )
+
+    @filter.command_group("recallguard")
+    def recallguard(self):
+        pass
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @recallguard.command("capture")
+    async def recallguard_capture(self, event: AstrMessageEvent):
+        yield event.plain_result(self._format_capture_stats())
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @recallguard.command("metrics")
+    async def recallguard_metrics(self, event: AstrMessageEvent):
+        yield event.plain_result(self.metrics.render_text())
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @recallguard.command("fetch")
+    async def recallguard_fetch(self, event: AstrMessageEvent):
+        yield event.plain_result(self._format_fetch_strategy())
+
+    def _format_fetch_strategy(self) -> str:
+        rows = self.fetch_strategy.table()
+        if not rows:
+            return "RecallGuard 尚未记录媒体获取接口的调用结果。"
+        lines = [f"RecallGuard 媒体获取策略 (已跳过的无效调用: {self.fetch_strategy.pruned_calls})"]
+        for bot_id, action, segment_type, name, stats in rows:
+            lines.append(
+                f"[{bot_id}] {segment_type}/{action} {name}: 成功 {stats.successes:.0f}，失败 {stats.failures:.0f}，"
+                f"成功率 {stats.success_rate:.1%}，平均耗时 {stats.latency * 1000:.0f}ms"
+            )
+        return "\n".join(lines)
+
+    def _format_capture_stats(self) -> str:
+        counters = self.recall_stats.counters
+        recalled = counters["recall_media_ready"] + counters["recall_media_fetched"]
+        hit_rate = counters["recall_media_ready"] / recalled if recalled else 0.0
+        lines = [
+            f"RecallGuard 媒体捕获模式: {'lazy' if self.lazy_capture else 'eager'}",
+            f"撤回时媒体已就绪率: {hit_rate:.1%} ({counters['recall_media_ready']}/{recalled})",
+            f"撤回时补抓: {counters['recall_media_fetched']}，仍缺失: {counters['recall_media_missing']}",
+            f"后台队列: {len(self.lazy_queue)}，入队 {counters['lazy_queued']}，完成 {counters['lazy_fetched']}，"
+            f"跳过 {counters['lazy_skipped']}，丢弃 {counters['lazy_dropped']}",
+        ]
+        if self.recall_from_get_msg:
+            metric_counters = self.metrics.counters
+            fallbacks = metric_counters.get("get_msg_fallback_hits", 0) + metric_counters.get("get_msg_fallback_misses", 0)
+            fallback_rate = metric_counters.get("get_msg_fallback_hits", 0) / fallbacks if fallbacks else 0.0
+            lines.append(
+                f"撤回来源: get_msg 成功 {metric_counters.get('get_msg_hits', 0)}，失败 {metric_counters.get('get_msg_failures', 0)}，"
+                f"缓存回退命中率 {fallback_rate:.1%} ({metric_counters.get('get_msg_fallback_hits', 0)}/{fallbacks})，"
+                f"仅预缓存媒体: {'是' if self.precache_media_only else '否'}"
+            )
+        for group_id, messages, recalls, rate in self.recall_stats.top_groups():
+            lines.append(f"群 {group_id}: 消息 {messages:.0f}，撤回 {recalls:.0f}，估计撤回率 {rate:.2%}")
+        return "\n".join(lines)
 
     async def _get_group_name(self, event: AstrMessageEvent, group_id: str) -> str:
         if not group_id or not isinstance(event, AiocqhttpMessageEvent):
             return ""
-        try:
-            group_info = await event.bot.api.call_action("get_group_info", group_id=int(group_id))
-            if isinstance(group_info, dict):
-                return group_info.get("group_name", "") or ""
-        except ActionFailed as e:
-            logger.warning(f"RecallGuard failed to fetch group name: group_id={group_id}, error={e}")
-        except Exception as e:
-            logger.error(f"RecallGuard unexpected group name error: group_id={group_id}, error={e}", exc_info=True)
-        return ""
+        if not self.prompt_template.uses("group_name"):
+            return ""
+        with self.metrics.timer("group_name_lookup"):
+            return await self.group_names.get(event.bot, group_id)
 
     def _extract_raw_segments(self, event: AstrMessageEvent) -> List[Dict[str, Any]]:
         raw_event = getattr(event.message_obj, "raw_message", None)
@@ -237,71 +594,73 @@ class RecallGuardPlugin(Star):
         return segments
 
     def _normalize_segment(self, segment: Dict[str, Any]) -> Dict[str, Any]:
-        normalized = copy.deepcopy(segment)
-        normalized["type"] = str(normalized.get("type", "")).lower()
-        data = normalized.get("data")
-        normalized["data"] = data if isinstance(data, dict) else {}
-        return normalized
+        data = segment.get("data")
+        return {**segment, "type": str(segment.get("type", "")).lower(), "data": dict(data) if isinstance(data, dict) else {}}
 
     def _filter_segments_by_config(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        conf_options = self.config.get("monitoring_options", {})
-        result: List[Dict[str, Any]] = []
-        for segment in segments:
-            segment_type = segment.get("type", "")
-            if segment_type == "text" and not conf_options.get("monitor_plain_text", True):
-                continue
-            if segment_type == "image" and not conf_options.get("monitor_images", True):
-                continue
-            if segment_type == "record" and not conf_options.get("monitor_audio", True):
-                continue
-            if segment_type == "video" and not conf_options.get("monitor_video", True):
-                continue
-            if segment_type == "file" and not conf_options.get("monitor_files", True):
-                continue
-            if segment_type not in {"text", "image", "record", "video", "file"} and not conf_options.get("monitor_other_segments", True):
-                continue
-            result.append(segment)
-        return result
-
-    async def _prepare_cache_segments(self, event: AstrMessageEvent, cache_key: str, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        cached_segments: List[Dict[str, Any]] = []
-        for index, segment in enumerate(segments):
-            prepared = await self._prepare_segment(event, cache_key, index, segment)
-            cached_segments.extend(prepared)
-        return cached_segments
+        return [segment for segment in segments if self.policy.allows_segment(segment.get("type", ""))]
+
+    async def _prepare_cache_segments(
+        self,
+        event: AstrMessageEvent,
+        cache_key: str,
+        segments: List[Dict[str, Any]],
+        fetch_media: bool = True,
+    ) -> List[Dict[str, Any]]:
+        prepared_groups = await asyncio.gather(
+            *(self._prepare_segment(event, cache_key, segment, fetch_media) for segment in segments)
+        )
+        return [prepared for group in prepared_groups for prepared in group]
 
-    async def _prepare_segment(self, event: AstrMessageEvent, cache_key: str, index: int, segment: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _prepare_segment(self, event: AstrMessageEvent, cache_key: str, segment: Dict[str, Any], fetch_media: bool = True) -> List[Dict[str, Any]]:
         segment_type = segment.get("type", "")
         if segment_type in MEDIA_ACTIONS:
-            return [await self._prepare_media_segment(event, cache_key, index, segment)]
+            if not fetch_media:
+                return [segment]
+            return [await self._prepare_media_segment(event, cache_key, segment)]
         if segment_type in DIRECT_SEGMENT_TYPES:
             return [segment]
         if segment_type in SUPPORTED_SUMMARY_TYPES or segment_type:
             return [self._summary_segment(segment_type or "unknown", json.dumps(segment, ensure_ascii=False))]
         return []
 
-    async def _prepare_media_segment(self, event: AstrMessageEvent, cache_key: str, index: int, segment: Dict[str, Any]) -> Dict[str, Any]:
-        prepared = copy.deepcopy(segment)
-        data = prepared.setdefault("data", {})
-        segment_type = prepared.get("type", "")
+    async def _prepare_media_segment(self, event: AstrMessageEvent, cache_key: str, segment: Dict[str, Any]) -> Dict[str, Any]:
+        data = segment.get("data") or {}
+        segment_type = segment.get("type", "")
         file_ref = data.get("file") or data.get("file_id") or data.get("url") or data.get("path") or data.get("file_unique")
-        local_path = self._existing_local_path(data)
-
-        if isinstance(file_ref, str) and file_ref.startswith(("http://", "https://")):
-            return prepared
-        if not local_path and isinstance(event, AiocqhttpMessageEvent) and file_ref:
-            local_path = await self._cache_file_from_api(event, cache_key, index, segment_type, str(file_ref))
+        max_bytes = self.media_size_limits.get(segment_type, 0)
+        try:
+            check_size(self._declared_size(data), max_bytes)
+            local_path = await self.io.run(self._existing_local_path, data)
+            if isinstance(file_ref, str) and file_ref.startswith(("http://", "https://")):
+                return segment
+            if local_path:
+                check_size(await self.io.getsize(local_path), max_bytes)
+            elif isinstance(event, AiocqhttpMessageEvent) and file_ref:
+                async with self.media_semaphore:
+                    local_path = await self._cache_file_from_api(event, cache_key, segment_type, str(file_ref), max_bytes)
+        except MediaTooLarge as e:
+            self.metrics.inc("media_oversized")
+            name = data.get("name") or data.get("file") or file_ref
+            return self._summary_segment(
+                segment_type,
+                f"{MEDIA_TYPE_LABELS.get(segment_type, '媒体')}文件 {e.size / 1024 / 1024:.1f}MB 超过 {e.limit / 1024 / 1024:g}MB 上限，"
+                f"已跳过缓存和直接重发: {name}",
+            )
         if local_path:
-            data["local_path"] = local_path
-            if segment_type == "video" and self._is_large_file(local_path, VIDEO_SIZE_LIMIT):
-                return self._summary_segment("video", f"视频文件超过 100MB，已跳过直接重发: {os.path.basename(local_path)}")
-            return prepared
+            return {**segment, "data": {**data, "local_path": local_path}}
         if segment_type == "record":
             return self._summary_segment(
                 "record",
                 f"语音文件获取失败，NapCat 未返回可发送的本地文件。原始引用: {file_ref}",
             )
-        return prepared
+        return segment
+
+    def _declared_size(self, data: Dict[str, Any]) -> int:
+        try:
+            return int(data.get("file_size") or data.get("size") or 0)
+        except (TypeError, ValueError):
+            return 0
 
     def _existing_local_path(self, data: Dict[str, Any]) -> Optional[str]:
         for key in ("local_path", "path", "file"):
@@ -312,32 +671,59 @@ class RecallGuardPlugin(Star):
                     return os.path.abspath(path)
         return None
 
-    async def _cache_file_from_api(self, event: AstrMessageEvent, cache_key: str, index: int, segment_type: str, file_ref: str) -> Optional[str]:
-        actions = MEDIA_ACTIONS.get(segment_type, ())
-        for action in actions:
-            for params in self._media_api_params(segment_type, file_ref):
-                try:
-                    api_response = await event.bot.api.call_action(action, **params)
-                    source_path = self._extract_source_path(api_response)
-                    if not source_path:
-                        continue
-                    if source_path.startswith("http://") or source_path.startswith("https://"):
-                        return None
-                    if not os.path.exists(source_path):
-                        logger.warning(
-                            f"RecallGuard media path not found: action={action}, file_ref={file_ref}, path={source_path}, cache_key={cache_key}"
-                        )
-                        continue
-                    _, file_ext = os.path.splitext(source_path)
-                    dest_path = os.path.join(self.cache_dir, self._safe_cache_name(cache_key, f"_{index}{file_ext or '.cache'}"))
-                    os.makedirs(self.cache_dir, exist_ok=True)
-                    shutil.copy2(source_path, dest_path)
-                    logger.info(f"RecallGuard cached media: action={action}, cache_key={cache_key}, path={dest_path}")
-                    return dest_path
-                except ActionFailed as e:
-                        logger.warning(f"RecallGuard media API failed: action={action}, params={params}, error={e}, cache_key={cache_key}")
-                except Exception as e:
-                    logger.error(f"RecallGuard media cache error: action={action}, params={params}, error={e}", exc_info=True)
+    async def _cache_file_from_api(
+        self,
+        event: AstrMessageEvent,
+        cache_key: str,
+        segment_type: str,
+        file_ref: str,
+        max_bytes: int = 0,
+    ) -> Optional[str]:
+        bot_id = str(event.get_self_id())
+        candidates = [
+            (action, params)
+            for action in MEDIA_ACTIONS.get(segment_type, ())
+            for params in self._media_api_params(segment_type, file_ref)
+        ]
+        for action, params in self.fetch_strategy.order(bot_id, segment_type, candidates):
+            started = time.monotonic()
+            elapsed = None
+            try:
+                api_response = await event.bot.api.call_action(action, **params)
+                elapsed = time.monotonic() - started
+                self.metrics.observe("media_fetch", elapsed)
+                source_path = self._extract_source_path(api_response)
+                self.fetch_strategy.record(bot_id, action, segment_type, params, bool(source_path), elapsed)
+                if not source_path:
+                    continue
+                if source_path.startswith("http://") or source_path.startswith("https://"):
+                    return None
+                _, file_ext = os.path.splitext(source_path)
+                with self.metrics.timer("file_copy"):
+                    stored = await self.media_store.store(source_path, file_ext, max_bytes)
+                if not stored:
+                    logger.warning(
+                        f"RecallGuard media path not found: action={action}, file_ref={file_ref}, path={source_path}, cache_key={cache_key}"
+                    )
+                    continue
+                dest_path, strategy = stored
+                if strategy != "dedup":
+                    self._enforce_cache_size()
+                logger.info(f"RecallGuard cached media: action={action}, strategy={strategy}, cache_key={cache_key}, path={dest_path}")
+                return dest_path
+            except MediaTooLarge:
+                raise
+            except ActionFailed as e:
+                elapsed = time.monotonic() - started
+                self.metrics.inc("media_fetch_failures")
+                self.metrics.observe("media_fetch_failed", elapsed)
+                self.fetch_strategy.record(bot_id, action, segment_type, params, False, elapsed)
+                logger.warning(f"RecallGuard media API failed: action={action}, params={params}, error={e}, cache_key={cache_key}")
+            except Exception as e:
+                if elapsed is None:
+                    self.metrics.inc("media_fetch_failures")
+                    self.metrics.observe("media_fetch_failed", time.monotonic() - started)
+                logger.error(f"RecallGuard media cache error: action={action}, params={params}, error={e}", exc_info=True)
         return None
 
     def _media_api_params(self, segment_type: str, file_ref: str) -> List[Dict[str, Any]]:
@@ -358,152 +744,281 @@ class RecallGuardPlugin(Star):
                     return str(value)
         return None
 
-    def _pop_cached_info(self, cache_keys: List[str]) -> Optional[Dict[str, Any]]:
+    def _pop_cached_info(self, cache_keys: List[str]) -> Optional[CacheRecord]:
         for cache_key in cache_keys:
-            cached_info = MESSAGE_CACHE.pop(cache_key, None)
+            cached_info = MESSAGE_CACHE.pop(cache_key)
             if cached_info:
                 return cached_info
         return None
 
-    async def _wait_and_pop_cached_info(self, cache_keys: List[str], message_id: str) -> Optional[Dict[str, Any]]:
-        wait_logged = False
-        for _ in range(60):
-            cached_info = None
-            for cache_key in cache_keys:
-                cached_info = MESSAGE_CACHE.get(cache_key)
-                if cached_info:
-                    break
-            if cached_info and not cached_info.get("preparing"):
-                return self._pop_cached_info(cache_keys)
-            if cached_info and not wait_logged:
-                logger.info(
-                    f"RecallGuard waiting for media cache: message_id={message_id}, "
-                    f"cache_key={cached_info.get('cache_key')}, segments={cached_info.get('message_type')}"
-                )
-                wait_logged = True
-            await asyncio.sleep(0.25)
+    def _find_cached_info(self, cache_keys: List[str]) -> Optional[CacheRecord]:
+        for cache_key in cache_keys:
+            cached_info = MESSAGE_CACHE.get(cache_key)
+            if cached_info:
+                return cached_info
+        return None
+
+    async def _take_persisted_info(self, cache_keys: List[str], message_id: str) -> Optional[CacheRecord]:
+        if not self.persistent_cache or not message_id:
+            return None
+        try:
+            records = await self.persistent_cache.take(message_id)
+        except Exception as e:
+            logger.error(f"RecallGuard persistent cache lookup failed: message_id={message_id}, error={e}", exc_info=True)
+            return None
+        records.sort(key=lambda record: cache_keys.index(record.cache_key) if record.cache_key in cache_keys else len(cache_keys))
+        for record in records[1:]:
+            self._remove_cached_files(record.segments)
+        return records[0] if records else None
+
+    async def _wait_and_pop_cached_info(self, cache_keys: List[str], message_id: str) -> Optional[CacheRecord]:
+        deadline = time.monotonic() + self.recall_wait_timeout
+        cached_info = self._find_cached_info(cache_keys)
+        if not cached_info:
+            persisted = await self._take_persisted_info(cache_keys, message_id)
+            if persisted:
+                self.metrics.inc("recall_persisted_hits")
+                logger.info(f"RecallGuard recall served from persistent cache: message_id={message_id}, cache_key={persisted.cache_key}")
+                return persisted
+        if not cached_info and message_id:
+            if await MESSAGE_CACHE.wait_for_message(message_id, self.recall_wait_timeout):
+                cache_keys.extend(key for key in MESSAGE_CACHE.keys_for_message(message_id) if key not in cache_keys)
+                cached_info = self._find_cached_info(cache_keys)
+        if cached_info and cached_info.preparing:
+            logger.info(
+                f"RecallGuard waiting for media cache: message_id={message_id}, "
+                f"cache_key={cached_info.cache_key}, segments={cached_info.message_type}"
+            )
+            try:
+                await asyncio.wait_for(cached_info.ready.wait(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.metrics.inc("recall_wait_timeouts")
+                logger.warning(f"RecallGuard media cache wait timed out: message_id={message_id}, cache_key={cached_info.cache_key}")
         cached_info = self._pop_cached_info(cache_keys)
-        if cached_info and cached_info.get("preparing"):
-            cached_info["preparing"] = False
-            cached_info["segments"] = [
+        if cached_info and cached_info.preparing:
+            cached_info.preparing = False
+            cached_info.segments = [
                 self._summary_segment(
-                    cached_info.get("message_type", "media"),
+                    cached_info.message_type or "media",
                     "媒体文件仍在缓存或已无法从 NapCat 获取，已跳过原始媒体重发。",
                 )
             ]
-            cached_info["message_type"] = "summary"
         return cached_info
 
-    async def _forward_recalled_content(self, cached_info: Dict[str, Any], bot_client: Any, bot_self_id: str):
+    async def _forward_recalled_content(self, cached_info: CacheRecord, bot_client: Any, bot_self_id: str):
         conf_fwd = self.config.get("forwarding_options", {})
-        forward_format = conf_fwd.get("forwarding_format", "sequential")
         target_sessions = conf_fwd.get("target_sessions", [])
         if not target_sessions:
-            logger.warning(f"RecallGuard has no forwarding targets: cache_key={cached_info.get('cache_key')}")
-            self._remove_cached_files(cached_info)
+            logger.warning(f"RecallGuard has no forwarding targets: cache_key={cached_info.cache_key}")
+            self._remove_cached_files(cached_info.segments)
             return
 
+        if self.coalesce_window > 0 and not self._has_segment_type(cached_info, {"record"}):
+            await self._buffer_recall(cached_info, bot_client, bot_self_id, tuple(target_sessions))
+            return
+        await self._deliver_recalled_content(cached_info, bot_client, bot_self_id, target_sessions)
+
+    async def _deliver_recalled_content(self, cached_info: CacheRecord, bot_client: Any, bot_self_id: str, target_sessions: List[str]):
+        forward_format = self.config.get("forwarding_options", {}).get("forwarding_format", "sequential")
+        payload = self._outbound_payload(cached_info)
         try:
             if forward_format == "merged":
-                await self._send_as_merged(cached_info, bot_client, bot_self_id, target_sessions)
+                await self._send_as_merged(payload, bot_client, bot_self_id, target_sessions)
             else:
-                await self._send_as_sequential(cached_info, bot_client, target_sessions)
+                await self._send_as_sequential(payload, bot_client, bot_self_id, target_sessions)
         finally:
-            self._remove_cached_files(cached_info)
+            self._remove_cached_files(cached_info.segments)
+
+    def _outbound_payload(self, cached_info: CacheRecord) -> OutboundPayload:
+        return OutboundPayload(cached_info, self._format_prompt_text(cached_info), self._build_native_segments, self._build_message_chain)
+
+    async def _buffer_recall(self, cached_info: CacheRecord, bot_client: Any, bot_self_id: str, target_sessions: Tuple[str, ...]):
+        batch = self.coalesce_buffers.setdefault(target_sessions, [])
+        batch.append(cached_info)
+        self.coalesce_bots[target_sessions] = (bot_client, bot_self_id)
+        if len(batch) >= self.coalesce_max_batch:
+            await self._flush_coalesced(target_sessions, bot_client, bot_self_id)
+        elif target_sessions not in self.coalesce_timers:
+            self.coalesce_timers[target_sessions] = asyncio.create_task(
+                self._flush_coalesced_later(target_sessions, bot_client, bot_self_id)
+            )
 
-    def _format_prompt_text(self, cached_info: Dict[str, Any]) -> str:
-        conf_fwd = self.config.get("forwarding_options", {})
-        template = conf_fwd.get("forward_message_text", "用户 {user_name}({user_id}) 撤回了一条消息：")
-        group_name = cached_info.get("group_name")
-        if not group_name:
-            group_id = cached_info.get("group_id")
-            group_name = f"群聊 {group_id}" if group_id else "私聊/未知群聊"
+    async def _flush_coalesced_later(self, target_sessions: Tuple[str, ...], bot_client: Any, bot_self_id: str):
+        await asyncio.sleep(self.coalesce_window)
+        self.coalesce_timers.pop(target_sessions, None)
         try:
-            return template.format(
-                user_name=cached_info.get("sender_name", ""),
-                user_id=cached_info.get("sender_id", ""),
-                group_name=group_name,
-                group_id=cached_info.get("group_id", ""),
-            )
+            await self._flush_coalesced(target_sessions, bot_client, bot_self_id)
         except Exception as e:
-            logger.warning(f"RecallGuard prompt template failed: {e}")
-            return f"用户 {cached_info.get('sender_name', '')}({cached_info.get('sender_id', '')}) 撤回了一条消息："
+            logger.error(f"RecallGuard failed to flush coalesced recalls: {e}", exc_info=True)
+
+    async def _flush_coalesced(self, target_sessions: Tuple[str, ...], bot_client: Any, bot_self_id: str):
+        timer = self.coalesce_timers.pop(target_sessions, None)
+        if timer and timer is not asyncio.current_task():
+            timer.cancel()
+        batch = self.coalesce_buffers.pop(target_sessions, [])
+        self.coalesce_bots.pop(target_sessions, None)
+        if not batch:
+            return
+        if len(batch) == 1:
+            await self._deliver_recalled_content(batch[0], bot_client, bot_self_id, list(target_sessions))
+            return
+
+        try:
+            await self._send_coalesced(batch, bot_client, bot_self_id, list(target_sessions))
+        finally:
+            for cached_info in batch:
+                self._remove_cached_files(cached_info.segments)
+
+    async def _send_coalesced(self, batch: List[CacheRecord], bot_client: Any, bot_self_id: str, target_sessions: List[str]):
+        nodes_payload = [
+            cqhttp_forwarder.create_forward_node(
+                bot_self_id,
+                "RecallGuard",
+                [cqhttp_forwarder.text_to_segment(f"检测到 {len(batch)} 条撤回消息：")],
+            )
+        ]
+        payloads = [self._outbound_payload(cached_info) for cached_info in batch]
+        for payload in payloads:
+            nodes_payload.extend(payload.merged_nodes(bot_self_id))
+        batch_keys = ",".join(cached_info.cache_key for cached_info in batch)
+        forward_format = self.config.get("forwarding_options", {}).get("forwarding_format", "sequential")
+
+        async def send_to(session_id: str):
+            await self._throttle(session_id)
+            if await cqhttp_forwarder.send_forward_message_by_api(bot_client, session_id, nodes_payload, bot_self_id):
+                logger.info(f"RecallGuard sent coalesced recalls: target={session_id}, count={len(batch)}")
+                return
+            logger.warning(f"RecallGuard coalesced send failed, fallback to per-message send: target={session_id}, cache_keys={batch_keys}")
+            for payload in payloads:
+                if self._has_segment_type(payload.record, {"record"}):
+                    await self._send_native_normal_to(payload, bot_client, session_id, "record segment requires native normal send")
+                elif forward_format == "merged":
+                    await self._send_merged_to(payload, bot_client, bot_self_id, session_id)
+                else:
+                    await self._send_sequential_to(payload, bot_client, bot_self_id, session_id)
+
+        await self._fan_out(target_sessions, send_to, batch_keys)
+
+    def _format_prompt_text(self, cached_info: CacheRecord) -> str:
+        group_name = cached_info.group_name
+        if not group_name:
+            group_id = cached_info.group_id
+            group_name = f"群聊 {group_id}" if group_id else "私聊/未知群聊"
+        return self.prompt_template.render(
+            {
+                "user_name": cached_info.sender_name,
+                "user_id": cached_info.sender_id,
+                "group_name": group_name,
+                "group_id": cached_info.group_id,
+            }
+        )
+
+    async def _throttle(self, session_id: str):
+        bucket = self.target_buckets.get(session_id)
+        if bucket is None:
+            bucket = self.target_buckets[session_id] = TokenBucket(self.target_rate, self.target_burst)
+        await bucket.acquire()
+
+    async def _fan_out(self, target_sessions: List[str], send_to: Callable[[str], Awaitable[None]], cache_key: str):
+        async def run(session_id: str):
+            async with self.send_semaphore:
+                try:
+                    with self.metrics.timer("target_send"):
+                        await send_to(session_id)
+                except Exception as e:
+                    self.metrics.inc("target_send_errors")
+                    logger.error(f"RecallGuard send to target failed: target={session_id}, cache_key={cache_key}, error={e}", exc_info=True)
+
+        await asyncio.gather(*(run(session_id) for session_id in target_sessions))
 
-    async def _send_as_sequential(self, cached_info: Dict[str, Any], bot_client: Any, target_sessions: List[str]):
-        if self._has_segment_type(cached_info, {"record"}):
-            await self._send_native_normal(cached_info, bot_client, target_sessions, "record segment requires native normal send")
+    async def _send_as_sequential(self, payload: OutboundPayload, bot_client: Any, bot_self_id: str, target_sessions: List[str]):
+        if self._has_segment_type(payload.record, {"record"}):
+            await self._send_native_normal(payload, bot_client, target_sessions, "record segment requires native normal send")
             return
 
-        prompt_message = MessageChain([CompPlain(text=self._format_prompt_text(cached_info))])
-        content_message = self._build_message_chain(cached_info)
-        native_segments = [cqhttp_forwarder.text_to_segment(self._format_prompt_text(cached_info))]
-        native_segments.extend(self._build_native_segments(cached_info))
+        async def send_to(session_id: str):
+            await self._send_sequential_to(payload, bot_client, bot_self_id, session_id)
+
+        await self._fan_out(target_sessions, send_to, payload.record.cache_key)
+
+    async def _send_sequential_to(self, payload: OutboundPayload, bot_client: Any, bot_self_id: str, session_id: str):
+        cached_info = payload.record
+        target_key = (cqhttp_forwarder.bot_key(bot_client, bot_self_id), session_id)
 
-        for session_id in target_sessions:
-            astr_ok = False
+        async def send_by_astrbot() -> bool:
             try:
-                await self.context.send_message(session_id, prompt_message)
-                if content_message:
-                    await self.context.send_message(session_id, content_message)
-                astr_ok = True
-                logger.info(f"RecallGuard sent sequential message by AstrBot: target={session_id}, cache_key={cached_info.get('cache_key')}")
+                await self._throttle(session_id)
+                if await self.context.send_message(session_id, payload.prompt_chain) is False:
+                    cqhttp_forwarder.CAPABILITIES.mark(target_key, "astrbot", False)
+                    logger.warning(f"RecallGuard AstrBot has no platform for target, using native send: target={session_id}")
+                    return False
+                if payload.content_chain:
+                    await self._throttle(session_id)
+                    await self.context.send_message(session_id, payload.content_chain)
+                logger.info(f"RecallGuard sent sequential message by AstrBot: target={session_id}, cache_key={cached_info.cache_key}")
+                return True
             except Exception as e:
-                logger.error(f"RecallGuard AstrBot sequential send failed: target={session_id}, cache_key={cached_info.get('cache_key')}, error={e}", exc_info=True)
+                logger.error(f"RecallGuard AstrBot sequential send failed: target={session_id}, cache_key={cached_info.cache_key}, error={e}", exc_info=True)
+                return False
+
+        async def send_by_native() -> bool:
+            await self._throttle(session_id)
+            return await cqhttp_forwarder.send_message_by_api(bot_client, session_id, payload.prompt_and_native)
+
+        senders = {"astrbot": send_by_astrbot, "native": send_by_native}
+        for path in cqhttp_forwarder.CAPABILITIES.order(target_key, list(senders)):
+            if await senders[path]():
+                cqhttp_forwarder.CAPABILITIES.mark(target_key, path, True)
+                return
+        logger.error(f"RecallGuard sequential send failed on all paths: target={session_id}, cache_key={cached_info.cache_key}")
+
+    async def _send_as_merged(self, payload: OutboundPayload, bot_client: Any, bot_self_id: str, target_sessions: List[str]):
+        if self._has_segment_type(payload.record, {"record"}):
+            await self._send_native_normal(payload, bot_client, target_sessions, "record segment is not reliable in merged forward")
+            return
+
+        async def send_to(session_id: str):
+            await self._send_merged_to(payload, bot_client, bot_self_id, session_id)
 
-            if not astr_ok:
-                ok = await cqhttp_forwarder.send_message_by_api(bot_client, session_id, native_segments)
-                if not ok:
-                    logger.error(f"RecallGuard native sequential fallback failed: target={session_id}, cache_key={cached_info.get('cache_key')}")
+        await self._fan_out(target_sessions, send_to, payload.record.cache_key)
 
-    async def _send_as_merged(self, cached_info: Dict[str, Any], bot_client: Any, bot_self_id: str, target_sessions: List[str]):
-        if self._has_segment_type(cached_info, {"record"}):
-            await self._send_native_normal(cached_info, bot_client, target_sessions, "record segment is not reliable in merged forward")
+    async def _send_merged_to(self, payload: OutboundPayload, bot_client: Any, bot_self_id: str, session_id: str):
+        cached_info = payload.record
+        await self._throttle(session_id)
+        if await cqhttp_forwarder.send_forward_message_by_api(bot_client, session_id, payload.merged_nodes(bot_self_id), bot_self_id):
             return
+        logger.warning(f"RecallGuard merged send failed, fallback to native normal message: target={session_id}, cache_key={cached_info.cache_key}")
+        await self._throttle(session_id)
+        if not await cqhttp_forwarder.send_message_by_api(bot_client, session_id, payload.prompt_and_native):
+            logger.error(f"RecallGuard merged fallback failed: target={session_id}, cache_key={cached_info.cache_key}")
 
-        prompt_node = cqhttp_forwarder.create_forward_node(
-            bot_self_id,
-            "RecallGuard",
-            [cqhttp_forwarder.text_to_segment(self._format_prompt_text(cached_info))],
-        )
-        content_node = cqhttp_forwarder.create_forward_node(
-            cached_info.get("sender_id", ""),
-            cached_info.get("sender_name", ""),
-            self._build_native_segments(cached_info),
-        )
-        nodes_payload = [prompt_node, content_node]
-        for session_id in target_sessions:
-            ok = await cqhttp_forwarder.send_forward_message_by_api(bot_client, session_id, nodes_payload)
-            if not ok:
-                logger.warning(f"RecallGuard merged send failed, fallback to native normal message: target={session_id}, cache_key={cached_info.get('cache_key')}")
-                segments = [cqhttp_forwarder.text_to_segment(self._format_prompt_text(cached_info))]
-                segments.extend(self._build_native_segments(cached_info))
-                if not await cqhttp_forwarder.send_message_by_api(bot_client, session_id, segments):
-                    logger.error(f"RecallGuard merged fallback failed: target={session_id}, cache_key={cached_info.get('cache_key')}")
-
-    async def _send_native_normal(self, cached_info: Dict[str, Any], bot_client: Any, target_sessions: List[str], reason: str):
-        content_segments = self._build_native_segments(cached_info)
-        for session_id in target_sessions:
-            logger.info(
-                f"RecallGuard sending native normal message: target={session_id}, "
-                f"cache_key={cached_info.get('cache_key')}, reason={reason}"
-            )
-            prompt_ok = await cqhttp_forwarder.send_message_by_api(
-                bot_client,
-                session_id,
-                [cqhttp_forwarder.text_to_segment(self._format_prompt_text(cached_info))],
-            )
-            content_ok = True
-            for segment in content_segments:
-                content_ok = await cqhttp_forwarder.send_message_by_api(bot_client, session_id, [segment]) and content_ok
-            if not prompt_ok or not content_ok:
-                logger.error(f"RecallGuard native normal send failed: target={session_id}, cache_key={cached_info.get('cache_key')}")
+    async def _send_native_normal(self, payload: OutboundPayload, bot_client: Any, target_sessions: List[str], reason: str):
+        async def send_to(session_id: str):
+            await self._send_native_normal_to(payload, bot_client, session_id, reason)
 
-    def _has_segment_type(self, cached_info: Dict[str, Any], segment_types: set[str]) -> bool:
-        return any(segment.get("type") in segment_types for segment in cached_info.get("segments", []))
+        await self._fan_out(target_sessions, send_to, payload.record.cache_key)
 
-    def _build_message_chain(self, cached_info: Dict[str, Any]) -> Optional[MessageChain]:
+    async def _send_native_normal_to(self, payload: OutboundPayload, bot_client: Any, session_id: str, reason: str):
+        cached_info = payload.record
+        logger.info(
+            f"RecallGuard sending native normal message: target={session_id}, "
+            f"cache_key={cached_info.cache_key}, reason={reason}"
+        )
+        await self._throttle(session_id)
+        prompt_ok = await cqhttp_forwarder.send_message_by_api(bot_client, session_id, [payload.prompt_segment])
+        content_ok = True
+        for segment in payload.native_segments:
+            await self._throttle(session_id)
+            content_ok = await cqhttp_forwarder.send_message_by_api(bot_client, session_id, [segment]) and content_ok
+        if not prompt_ok or not content_ok:
+            logger.error(f"RecallGuard native normal send failed: target={session_id}, cache_key={cached_info.cache_key}")
+
+    def _has_segment_type(self, cached_info: CacheRecord, segment_types: set[str]) -> bool:
+        return any(segment.get("type") in segment_types for segment in cached_info.segments)
+
+    def _build_message_chain(self, cached_info: CacheRecord) -> Optional[MessageChain]:
         components: List[Any] = []
-        for segment in cached_info.get("segments", []):
+        for segment in cached_info.segments:
             component = self._segment_to_component(segment)
             if component:
                 components.append(component)
@@ -538,9 +1053,9 @@ class RecallGuardPlugin(Star):
             return component_cls(file=str(file_value))
         return None
 
-    def _build_native_segments(self, cached_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _build_native_segments(self, cached_info: CacheRecord) -> List[Dict[str, Any]]:
         segments: List[Dict[str, Any]] = []
-        for segment in cached_info.get("segments", []):
+        for segment in cached_info.segments:
             native = self._segment_to_native(segment)
             if native:
                 segments.append(native)
@@ -548,7 +1063,7 @@ class RecallGuardPlugin(Star):
 
     def _segment_to_native(self, segment: Dict[str, Any]) -> Dict[str, Any]:
         segment_type = segment.get("type", "")
-        data = copy.deepcopy(segment.get("data", {}))
+        data = segment.get("data", {})
         local_path = data.get("local_path")
         if local_path and os.path.exists(local_path):
             if segment_type == "image":
@@ -557,9 +1072,11 @@ class RecallGuardPlugin(Star):
                 return cqhttp_forwarder.local_audio_to_segment(local_path)
             if segment_type == "video":
                 return cqhttp_forwarder.local_video_to_segment(local_path)
-            data["file"] = f"file:///{os.path.abspath(local_path).replace(os.sep, '/')}"
         if segment_type in DIRECT_SEGMENT_TYPES:
-            data.pop("local_path", None)
+            if "local_path" in data:
+                data = {key: value for key, value in data.items() if key != "local_path"}
+                if local_path and os.path.exists(local_path):
+                    data["file"] = f"file:///{os.path.abspath(local_path).replace(os.sep, '/')}"
             return {"type": segment_type, "data": data}
         return self._summary_segment(segment_type or "unknown", json.dumps(segment, ensure_ascii=False))
 
@@ -569,77 +1086,100 @@ class RecallGuardPlugin(Star):
     def _segment_summary(self, segment: Dict[str, Any]) -> str:
         return f"[撤回消息段: {segment.get('type', 'unknown')}]\n{json.dumps(segment, ensure_ascii=False)}"
 
-    def _describe_segment_types(self, segments: List[Dict[str, Any]]) -> str:
-        return ",".join(segment.get("type", "unknown") for segment in segments)
+    def _on_cache_evict(self, record: CacheRecord, scope: str = ""):
+        self.metrics.inc("cache_evictions")
+        if scope:
+            self.metrics.inc("cache_quota_evictions")
+        if not record.preparing:
+            self._remove_cached_files(record.segments)
+        logger.info(
+            f"RecallGuard evicted cache entry over {'quota of ' + scope if scope else 'budget'}: "
+            f"cache_key={record.cache_key}, cache_size={len(MESSAGE_CACHE)}"
+        )
 
-    def _remove_cached_files(self, cached_info: Dict[str, Any]):
-        for segment in cached_info.get("segments", []):
-            local_path = segment.get("data", {}).get("local_path")
-            if local_path and os.path.exists(local_path):
-                try:
-                    os.remove(local_path)
-                except Exception as e:
-                    logger.error(f"RecallGuard failed to delete cache file: path={local_path}, error={e}")
+    def _remove_cached_files(self, segments: List[Dict[str, Any]]):
+        for segment in segments:
+            data = segment.get("data")
+            if isinstance(data, dict) and data.get("local_path"):
+                self.media_store.release(data["local_path"])
 
     async def _periodic_cleanup(self):
-        conf_cleanup = self.config.get("cleanup_options", {})
-        interval = conf_cleanup.get("cleanup_interval_seconds", 600)
         while self.running:
-            await asyncio.sleep(interval)
+            await asyncio.sleep(self.cleanup_interval)
             try:
-                self._cleanup_expired(conf_cleanup.get("cache_lifetime_seconds", 86400))
-                self._cleanup_cache_dir(conf_cleanup.get("max_cache_size_mb", 1024))
+                if self.persistent_cache:
+                    expired_files = await self.persistent_cache.take_expired(time.time() - self.cache_lifetime)
+                    for path in expired_files:
+                        self.media_store.release(path)
+                self._enforce_cache_size()
+                self.recall_stats.decay(0.5 ** (self.cleanup_interval / RECALL_STATS_HALF_LIFE_SECONDS))
+                self.fetch_strategy.decay(0.5 ** (self.cleanup_interval / FETCH_STATS_HALF_LIFE_SECONDS))
+                if self.io.queue_depth:
+                    logger.info(f"RecallGuard I/O queue depth after cleanup: {self.io.stats()}")
             except Exception as e:
                 logger.error(f"RecallGuard cleanup task failed: {e}", exc_info=True)
 
-    def _cleanup_expired(self, lifetime: int):
-        expiration_time = time.time() - lifetime
-        keys_to_delete = [cache_key for cache_key, data in MESSAGE_CACHE.items() if data.get("timestamp", 0) < expiration_time]
-        for cache_key in keys_to_delete:
-            cached_info = MESSAGE_CACHE.pop(cache_key, None)
-            if cached_info:
-                self._remove_cached_files(cached_info)
-        if keys_to_delete:
-            logger.info(f"RecallGuard expired cleanup removed {len(keys_to_delete)} records.")
-
-    def _cleanup_cache_dir(self, max_size_mb: int):
-        if max_size_mb <= 0 or not os.path.isdir(self.cache_dir):
-            return
-        max_size_bytes = max_size_mb * 1024 * 1024
-        files = [
-            os.path.join(self.cache_dir, f)
-            for f in os.listdir(self.cache_dir)
-            if os.path.isfile(os.path.join(self.cache_dir, f))
-        ]
-        total_size = sum(os.path.getsize(path) for path in files)
-        if total_size <= max_size_bytes:
-            return
-        files.sort(key=lambda path: os.path.getmtime(path))
-        removed = 0
-        while total_size > max_size_bytes and files:
-            file_to_delete = files.pop(0)
+    async def _expiry_loop(self):
+        while self.running:
+            next_expiry = MESSAGE_CACHE.next_expiry()
+            delay = self.cleanup_interval if next_expiry is None else next_expiry + self.cache_lifetime - time.time()
+            MESSAGE_CACHE.expiry_wakeup.clear()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(MESSAGE_CACHE.expiry_wakeup.wait(), max(delay, EXPIRY_RESOLUTION_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
             try:
-                file_size = os.path.getsize(file_to_delete)
-                os.remove(file_to_delete)
-                total_size -= file_size
-                removed += 1
-                self._drop_cache_entries_by_file(file_to_delete)
+                self._expire_due()
             except Exception as e:
-                logger.error(f"RecallGuard size cleanup failed: path={file_to_delete}, error={e}")
-        logger.info(f"RecallGuard size cleanup removed {removed} files.")
+                logger.error(f"RecallGuard expiry task failed: {e}", exc_info=True)
 
-    def _drop_cache_entries_by_file(self, file_path: str):
-        for cache_key, cached_info in list(MESSAGE_CACHE.items()):
-            for segment in cached_info.get("segments", []):
-                if segment.get("data", {}).get("local_path") == file_path:
-                    MESSAGE_CACHE.pop(cache_key, None)
-                    break
+    def _expire_due(self):
+        expired = MESSAGE_CACHE.pop_expired(time.time() - self.cache_lifetime)
+        for record in expired:
+            self._remove_cached_files(record.segments)
+        if expired:
+            self.metrics.inc("cache_expirations", len(expired))
+            logger.debug(f"RecallGuard expired {len(expired)} records.")
 
-    def _is_large_file(self, file_path: str, limit: int) -> bool:
+    async def _dump_metrics_loop(self, interval: float):
+        while self.running:
+            await asyncio.sleep(interval)
+            try:
+                await self.io.run(self.metrics.dump_prometheus, self.metrics_dump_path)
+            except Exception as e:
+                logger.error(f"RecallGuard failed to dump metrics: {e}", exc_info=True)
+
+    async def _load_disk_ledger(self):
         try:
-            return os.path.getsize(file_path) > limit
-        except OSError:
-            return False
+            files = await self.io.scan(self.cache_dir)
+            self.media_store.seed(files)
+            logger.info(f"RecallGuard disk ledger loaded: files={self.media_store.file_count}, bytes={self.media_store.total_bytes}")
+        except Exception as e:
+            logger.error(f"RecallGuard failed to scan cache dir: {e}", exc_info=True)
+
+    def _enforce_cache_size(self):
+        max_size_bytes = self.max_cache_size_mb * 1024 * 1024
+        if max_size_bytes <= 0 or self.media_store.total_bytes <= max_size_bytes:
+            return
+        orphans = released = 0
+        for file_path in self.media_store.files_by_age():
+            if self.media_store.total_bytes <= max_size_bytes:
+                break
+            if not self.media_store.is_managed(file_path):
+                if self.cold_refs_loaded and self.media_store.remove_orphan(file_path):
+                    orphans += 1
+            elif self._drop_cache_entries_by_file(file_path):
+                released += 1
+        if orphans or released:
+            logger.info(f"RecallGuard size cleanup removed {orphans} orphan files and released {released} shared files.")
+
+    def _drop_cache_entries_by_file(self, file_path: str) -> bool:
+        for cache_key in MESSAGE_CACHE.keys_for_file(file_path):
+            cached_info = MESSAGE_CACHE.pop(cache_key)
+            if cached_info:
+                self._remove_cached_files(cached_info.segments)
+        return not self.media_store.is_managed(file_path)
 
     def _safe_copy(self, value: Any) -> Any:
         try:
@@ -0,0 +1,215 @@
+"""Content-addressed, reference-counted media store for RecallGuard."""
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from .cache_io import CacheIO, check_size
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file(path: str, max_bytes: int = 0) -> Optional[Tuple[str, int]]:
+    try:
+        check_size(os.path.getsize(path), max_bytes)
+    except FileNotFoundError:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            check_size(size, max_bytes)
+            digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+def _stat_file(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino, stat.st_size
+
+
+def _is_inode(path: str, device: int, inode: int) -> bool:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return (stat.st_dev, stat.st_ino) == (device, inode)
+
+
+class MediaStore:
+    def __init__(self, cache_dir: str, io: CacheIO):
+        self.cache_dir = cache_dir
+        self.io = io
+        self._refs: Dict[str, int] = {}
+        self._writes: Dict[str, asyncio.Future] = {}
+        self._unlinks: Dict[str, asyncio.Future] = {}
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.dedup_hits = 0
+        try:
+            self._cache_device: Optional[int] = os.stat(cache_dir).st_dev
+        except OSError:
+            self._cache_device = None
+
+    def is_managed(self, path: str) -> bool:
+        return path in self._refs
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    @property
+    def file_count(self) -> int:
+        return len(self._files)
+
+    def file_size(self, path: str) -> int:
+        return self._files.get(path, 0)
+
+    def files_by_age(self) -> Iterator[str]:
+        visited: Set[str] = set()
+        while True:
+            try:
+                for path in self._files:
+                    if path not in visited:
+                        visited.add(path)
+                        yield path
+                return
+            except RuntimeError:
+                continue
+
+    def _track(self, path: str, size: int):
+        previous = self._files.get(path)
+        if previous is not None:
+            self._total_bytes -= previous
+        self._files[path] = size
+        self._files.move_to_end(path)
+        self._total_bytes += size
+
+    def _forget(self, path: str):
+        size = self._files.pop(path, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def seed(self, files: Iterable[Tuple[str, int, float]]):
+        for path, size, _ in sorted(files, key=lambda item: item[2], reverse=True):
+            if path in self._files:
+                continue
+            self._files[path] = size
+            self._files.move_to_end(path, last=False)
+            self._total_bytes += size
+
+    def remove_orphan(self, path: str) -> bool:
+        if path in self._refs or path in self._writes:
+            return False
+        self._forget(path)
+        self._unlink(path)
+        return True
+
+    def _unlink(self, path: str):
+        future = self.io.discard([path])
+        if future is None:
+            return
+        unlink = asyncio.wrap_future(future)
+        self._unlinks[path] = unlink
+
+        def done(_):
+            if self._unlinks.get(path) is unlink:
+                del self._unlinks[path]
+
+        unlink.add_done_callback(done)
+
+    async def store(self, source_path: str, file_ext: str, max_bytes: int = 0) -> Optional[Tuple[str, str]]:
+        if self.io.link_mode == "auto" and self._cache_device is not None:
+            stat = await self.io.run(_stat_file, source_path)
+            if not stat:
+                return None
+            device, inode, size = stat
+            check_size(size, max_bytes)
+            if device == self._cache_device:
+                dest_path = os.path.join(self.cache_dir, f"{device:x}-{inode:x}{file_ext or '.cache'}")
+                stored = await self._store_at(
+                    dest_path,
+                    size,
+                    lambda: self.io.run(_is_inode, dest_path, device, inode),
+                    lambda: self.io.link(source_path, dest_path),
+                )
+                if stored:
+                    return stored
+
+        hashed = await self.io.run(_hash_file, source_path, max_bytes)
+        if not hashed:
+            return None
+        digest, size = hashed
+        dest_path = os.path.join(self.cache_dir, f"{digest}{file_ext or '.cache'}")
+        return await self._store_at(
+            dest_path,
+            size,
+            lambda: self.io.run(os.path.exists, dest_path),
+            lambda: self.io.copy(source_path, dest_path, max_bytes),
+        )
+
+    async def _store_at(
+        self,
+        dest_path: str,
+        size: int,
+        exists: Callable[[], Awaitable[bool]],
+        write: Callable[[], Awaitable[Optional[str]]],
+    ) -> Optional[Tuple[str, str]]:
+        self._refs[dest_path] = self._refs.get(dest_path, 0) + 1
+        pending = self._writes.get(dest_path)
+        if pending is not None:
+            strategy = await asyncio.shield(pending)
+            if strategy:
+                self.dedup_hits += 1
+                return dest_path, "dedup"
+            self.release(dest_path)
+            return None
+        if dest_path in self._files and dest_path not in self._unlinks:
+            self.dedup_hits += 1
+            self._track(dest_path, size)
+            return dest_path, "dedup"
+
+        pending = asyncio.get_running_loop().create_future()
+        self._writes[dest_path] = pending
+        strategy = None
+        try:
+            unlink = self._unlinks.get(dest_path)
+            if unlink is not None:
+                await asyncio.shield(unlink)
+            strategy = "dedup" if await exists() else await write()
+        finally:
+            self._writes.pop(dest_path, None)
+            pending.set_result(strategy)
+            if not strategy:
+                self.release(dest_path)
+        if not strategy:
+            return None
+        if strategy == "dedup":
+            self.dedup_hits += 1
+        self._track(dest_path, size)
+        return dest_path, strategy
+
+    def acquire(self, path: str):
+        self._refs[path] = self._refs.get(path, 0) + 1
+
+    def release(self, path: str) -> bool:
+        count = self._refs.get(path)
+        if count is None:
+            return False
+        if count > 1:
+            self._refs[path] = count - 1
+            return False
+        del self._refs[path]
+        self._forget(path)
+        self._unlink(path)
+        return True
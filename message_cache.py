@@ -0,0 +1,301 @@
+"""In-memory message cache for RecallGuard with a message_id reverse index."""
+
+import asyncio
+import heapq
+import itertools
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+RECORD_OVERHEAD = 256
+EXPIRY_COMPACT_SLACK = 1024
+
+
+class CacheRecord:
+    __slots__ = (
+        "message_id",
+        "cache_key",
+        "sender_id",
+        "sender_name",
+        "group_id",
+        "group_name",
+        "timestamp",
+        "segments",
+        "raw_event",
+        "preparing",
+        "ready",
+        "media_pending",
+        "size",
+        "media_bytes",
+    )
+
+    def __init__(
+        self,
+        message_id: str,
+        cache_key: str,
+        sender_id: str,
+        sender_name: str,
+        group_id: str,
+        timestamp: float,
+        segments: List[Dict[str, Any]],
+        raw_event: Any = None,
+        group_name: str = "",
+        preparing: bool = False,
+        ready: Optional[asyncio.Event] = None,
+    ):
+        self.message_id = message_id
+        self.cache_key = cache_key
+        self.sender_id = sender_id
+        self.sender_name = sender_name
+        self.group_id = group_id
+        self.group_name = group_name
+        self.timestamp = timestamp
+        self.segments = segments
+        self.raw_event = raw_event
+        self.preparing = preparing
+        self.ready = ready
+        self.media_pending = False
+        self.size = 0
+        self.media_bytes = 0
+
+    @property
+    def local_paths(self) -> List[str]:
+        return [
+            segment["data"]["local_path"]
+            for segment in self.segments
+            if isinstance(segment.get("data"), dict) and segment["data"].get("local_path")
+        ]
+
+    @property
+    def quota_scopes(self) -> List[str]:
+        scopes = [f"user:{self.sender_id}"]
+        if self.group_id:
+            scopes.insert(0, f"group:{self.group_id}")
+        return scopes
+
+    @property
+    def message_type(self) -> str:
+        return ",".join(segment.get("type", "unknown") for segment in self.segments)
+
+    def estimate_size(self) -> int:
+        size = RECORD_OVERHEAD
+        for value in (self.message_id, self.cache_key, self.sender_id, self.sender_name, self.group_id, self.group_name):
+            size += sys.getsizeof(value)
+        size += _estimate_size(self.segments)
+        if self.raw_event is not None:
+            size += _estimate_size(self.raw_event)
+        return size
+
+
+def _estimate_size(value: Any) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class MessageCache:
+    def __init__(self):
+        self._entries: "OrderedDict[str, CacheRecord]" = OrderedDict()
+        self._by_message_id: Dict[str, Dict[str, None]] = {}
+        self._by_file: Dict[str, Dict[str, None]] = {}
+        self._arrivals: Dict[str, asyncio.Event] = {}
+        self._expiry: List[Tuple[float, int, str]] = []
+        self._expiry_seq = itertools.count()
+        self.expiry_wakeup = asyncio.Event()
+        self._bytes = 0
+        self.max_entries = 0
+        self.max_bytes = 0
+        self.quotas: Dict[str, Tuple[int, int]] = {}
+        self._scopes: Dict[str, "OrderedDict[str, None]"] = {}
+        self._scope_media: Dict[str, int] = {}
+        self.media_size: Optional[Callable[[str], int]] = None
+        self.on_evict: Optional[Callable[[CacheRecord, str], None]] = None
+        self.journal: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, cache_key: object) -> bool:
+        return cache_key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def configure(self, max_entries: int, max_bytes: int, on_evict: Optional[Callable[[CacheRecord, str], None]] = None):
+        self.max_entries = max(int(max_entries), 0)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.on_evict = on_evict
+        self._evict_over_budget()
+
+    def configure_quotas(
+        self,
+        group_entries: int,
+        group_media_bytes: int,
+        user_entries: int,
+        user_media_bytes: int,
+        media_size: Optional[Callable[[str], int]] = None,
+    ):
+        self.quotas = {
+            kind: (max(int(entries), 0), max(int(media_bytes), 0))
+            for kind, entries, media_bytes in (
+                ("group", group_entries, group_media_bytes),
+                ("user", user_entries, user_media_bytes),
+            )
+            if entries or media_bytes
+        }
+        self.media_size = media_size
+        self._scopes.clear()
+        self._scope_media.clear()
+        for cache_key, record in self._entries.items():
+            self._index_scopes(cache_key, record)
+        for scope in list(self._scopes):
+            self._evict_over_quota(scope)
+
+    def get(self, cache_key: str) -> Optional[CacheRecord]:
+        return self._entries.get(cache_key)
+
+    def items(self) -> List[Tuple[str, CacheRecord]]:
+        return list(self._entries.items())
+
+    def put(self, cache_key: str, record: CacheRecord):
+        previous = self._entries.get(cache_key)
+        if previous is not None:
+            self._unindex(cache_key, previous)
+        record.size = record.estimate_size()
+        self._entries[cache_key] = record
+        if previous is not record:
+            if not self._expiry:
+                self.expiry_wakeup.set()
+            heapq.heappush(self._expiry, (record.timestamp, next(self._expiry_seq), cache_key))
+            if len(self._expiry) > 2 * len(self._entries) + EXPIRY_COMPACT_SLACK:
+                self._compact_expiry()
+        self._entries.move_to_end(cache_key)
+        self._bytes += record.size
+        if record.message_id:
+            self._by_message_id.setdefault(record.message_id, {})[cache_key] = None
+            arrival = self._arrivals.pop(record.message_id, None)
+            if arrival is not None:
+                arrival.set()
+        for path in record.local_paths:
+            self._by_file.setdefault(path, {})[cache_key] = None
+        if self.media_size is not None:
+            record.media_bytes = sum(self.media_size(path) for path in record.local_paths)
+        self._index_scopes(cache_key, record)
+        if self.journal is not None and not record.preparing:
+            self.journal.save(record)
+        for scope in record.quota_scopes:
+            self._evict_over_quota(scope)
+        self._evict_over_budget()
+
+    def pop(self, cache_key: str) -> Optional[CacheRecord]:
+        record = self._entries.pop(cache_key, None)
+        if record is not None:
+            self._unindex(cache_key, record)
+            if self.journal is not None:
+                self.journal.delete(cache_key)
+        return record
+
+    def keys_for_message(self, message_id: str) -> List[str]:
+        return list(self._by_message_id.get(message_id, ()))
+
+    def keys_for_file(self, path: str) -> List[str]:
+        return list(self._by_file.get(path, ()))
+
+    def next_expiry(self) -> Optional[float]:
+        while self._expiry:
+            timestamp, _, cache_key = self._expiry[0]
+            record = self._entries.get(cache_key)
+            if record is not None and record.timestamp == timestamp:
+                return timestamp
+            heapq.heappop(self._expiry)
+        return None
+
+    def pop_expired(self, before: float) -> List[CacheRecord]:
+        expired: List[CacheRecord] = []
+        while self._expiry and self._expiry[0][0] < before:
+            timestamp, _, cache_key = heapq.heappop(self._expiry)
+            record = self._entries.get(cache_key)
+            if record is not None and record.timestamp == timestamp:
+                self.pop(cache_key)
+                expired.append(record)
+        return expired
+
+    def _compact_expiry(self):
+        self._expiry = [item for item in self._expiry if item[2] in self._entries and self._entries[item[2]].timestamp == item[0]]
+        heapq.heapify(self._expiry)
+
+    async def wait_for_message(self, message_id: str, timeout: float) -> bool:
+        if message_id in self._by_message_id:
+            return True
+        arrival = self._arrivals.setdefault(message_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(arrival.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            if self._arrivals.get(message_id) is arrival:
+                del self._arrivals[message_id]
+            return False
+
+    def _over_budget(self) -> bool:
+        if self.max_entries and len(self._entries) > self.max_entries:
+            return True
+        return bool(self.max_bytes and self._bytes > self.max_bytes)
+
+    def _evict_over_budget(self):
+        while len(self._entries) > 1 and self._over_budget():
+            self._evict(next(iter(self._entries)), "")
+
+    def _over_quota(self, scope: str) -> bool:
+        max_entries, max_media_bytes = self.quotas[scope.split(":", 1)[0]]
+        if max_entries and len(self._scopes[scope]) > max_entries:
+            return True
+        return bool(max_media_bytes and self._scope_media[scope] > max_media_bytes)
+
+    def _evict_over_quota(self, scope: str):
+        while len(self._scopes.get(scope, ())) > 1 and self._over_quota(scope):
+            self._evict(next(iter(self._scopes[scope])), scope)
+
+    def _evict(self, cache_key: str, scope: str):
+        record = self._entries.pop(cache_key)
+        self._unindex(cache_key, record)
+        if self.journal is not None:
+            self.journal.delete(cache_key)
+        if self.on_evict is not None:
+            self.on_evict(record, scope)
+
+    def _index_scopes(self, cache_key: str, record: CacheRecord):
+        for scope in record.quota_scopes:
+            if scope.split(":", 1)[0] in self.quotas:
+                self._scopes.setdefault(scope, OrderedDict())[cache_key] = None
+                self._scope_media[scope] = self._scope_media.get(scope, 0) + record.media_bytes
+
+    def _unindex(self, cache_key: str, record: CacheRecord):
+        self._bytes -= record.size
+        _discard_key(self._by_message_id, record.message_id, cache_key)
+        for path in record.local_paths:
+            _discard_key(self._by_file, path, cache_key)
+        for scope in record.quota_scopes:
+            keys = self._scopes.get(scope)
+            if keys is None or cache_key not in keys:
+                continue
+            del keys[cache_key]
+            self._scope_media[scope] -= record.media_bytes
+            if not keys:
+                del self._scopes[scope]
+                del self._scope_media[scope]
+
+
+def _discard_key(index: Dict[str, Dict[str, None]], value: str, cache_key: str):
+    keys = index.get(value)
+    if keys is None:
+        return
+    keys.pop(cache_key, None)
+    if not keys:
+        del index[value]
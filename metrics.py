@@ -0,0 +1,135 @@
+"""In-process counters, gauges and latency histograms for RecallGuard."""
+
+import bisect
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "recallguard"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else float("inf")
+        return float("inf")
+
+
+def _format_bound(seconds: float) -> str:
+    if seconds == float("inf"):
+        return f">{LATENCY_BUCKETS[-1] * 1000:.0f}ms"
+    return f"<={seconds * 1000:.0f}ms"
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self.counter_sources: Dict[str, Callable[[], int]] = {}
+        self.started = time.time()
+
+    def inc(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def gauge(self, name: str, read: Callable[[], float]):
+        self.gauges[name] = read
+
+    def counter_source(self, name: str, read: Callable[[], int]):
+        self.counter_sources[name] = read
+
+    def read_counters(self) -> Dict[str, int]:
+        values = dict(self.counters)
+        for name, read in self.counter_sources.items():
+            try:
+                values[name] = int(read())
+            except Exception:
+                continue
+        return values
+
+    def read_gauges(self) -> Dict[str, float]:
+        values = {}
+        for name, read in self.gauges.items():
+            try:
+                values[name] = float(read())
+            except Exception:
+                continue
+        return values
+
+    def render_text(self) -> str:
+        lines = [f"RecallGuard 运行指标 (运行 {time.time() - self.started:.0f}s)"]
+        for name, value in sorted(self.read_gauges().items()):
+            lines.append(f"{name}: {value:.0f}")
+        for name, value in sorted(self.read_counters().items()):
+            lines.append(f"{name}: {value}")
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            lines.append(
+                f"{name}: n={histogram.count}, avg={histogram.total / histogram.count * 1000:.1f}ms, "
+                f"p50{_format_bound(histogram.quantile(0.5))}, p99{_format_bound(histogram.quantile(0.99))}"
+            )
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, value in sorted(self.read_gauges().items()):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name} {value}")
+        for name, value in sorted(self.read_counters().items()):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            lines.append(f"{METRIC_PREFIX}_{name}_total {value}")
+        for name, histogram in sorted(self.histograms.items()):
+            metric = f"{METRIC_PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.total}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path: str):
+        tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
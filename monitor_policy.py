@@ -0,0 +1,52 @@
+"""Precompiled monitoring policy for RecallGuard."""
+
+from typing import Any, FrozenSet, Mapping, NamedTuple
+
+
+SEGMENT_TYPE_OPTIONS = {
+    "text": "monitor_plain_text",
+    "image": "monitor_images",
+    "record": "monitor_audio",
+    "video": "monitor_video",
+    "file": "monitor_files",
+}
+
+
+class MonitorPolicy(NamedTuple):
+    blacklist_users: FrozenSet[str]
+    monitored_users: FrozenSet[str]
+    monitored_groups: FrozenSet[str]
+    blocked_segment_types: FrozenSet[str]
+    monitor_other_segments: bool
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "MonitorPolicy":
+        conf_user = config.get("user_monitoring", {})
+        conf_group = config.get("group_monitoring", {})
+        conf_options = config.get("monitoring_options", {})
+        monitored_groups: FrozenSet[str] = frozenset()
+        if conf_group.get("enable_group_monitoring"):
+            monitored_groups = frozenset(
+                str(g).split(":")[-1] for g in conf_group.get("monitored_groups", []) if str(g).strip()
+            )
+        return cls(
+            blacklist_users=frozenset(str(u) for u in conf_user.get("blacklist_users", [])),
+            monitored_users=frozenset(str(u) for u in conf_user.get("monitored_users", [])),
+            monitored_groups=monitored_groups,
+            blocked_segment_types=frozenset(
+                segment_type for segment_type, option in SEGMENT_TYPE_OPTIONS.items() if not conf_options.get(option, True)
+            ),
+            monitor_other_segments=bool(conf_options.get("monitor_other_segments", True)),
+        )
+
+    def should_monitor(self, sender_id: str, group_id: str) -> bool:
+        if sender_id in self.blacklist_users:
+            return False
+        if sender_id in self.monitored_users:
+            return True
+        return bool(group_id) and group_id in self.monitored_groups
+
+    def allows_segment(self, segment_type: str) -> bool:
+        if segment_type in SEGMENT_TYPE_OPTIONS:
+            return segment_type not in self.blocked_segment_types
+        return self.monitor_other_segments
@@ -0,0 +1,104 @@
+"""Render-once outbound payloads for RecallGuard recall forwarding."""
+
+import string
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from astrbot.api import logger
+from astrbot.api.event import MessageChain
+from astrbot.api.message_components import Plain as CompPlain
+
+from . import cqhttp_forwarder
+from .message_cache import CacheRecord
+
+
+DEFAULT_PROMPT_TEMPLATE = "用户 {user_name}({user_id}) 撤回了一条消息："
+PROMPT_FIELDS = frozenset({"user_name", "user_id", "group_name", "group_id"})
+CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+
+def _compile(template: str) -> List[Tuple[str, Optional[str], str, Optional[str]]]:
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if field is not None and field not in PROMPT_FIELDS:
+            raise KeyError(field)
+        parts.append((literal, field, spec or "", conversion))
+    return parts
+
+
+class PromptTemplate:
+    def __init__(self, template: str = DEFAULT_PROMPT_TEMPLATE):
+        self.template = template
+        try:
+            self._parts = _compile(template)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"RecallGuard prompt template is invalid, using default: {e}")
+            self._parts = _compile(DEFAULT_PROMPT_TEMPLATE)
+        self.fields = frozenset(field for _, field, _, _ in self._parts if field)
+
+    def uses(self, field: str) -> bool:
+        return field in self.fields
+
+    def render(self, values: Dict[str, str]) -> str:
+        try:
+            rendered = []
+            for literal, field, spec, conversion in self._parts:
+                rendered.append(literal)
+                if field is None:
+                    continue
+                value: Any = values[field]
+                if conversion:
+                    value = CONVERSIONS[conversion](value)
+                rendered.append(format(value, spec) if spec else str(value))
+            return "".join(rendered)
+        except Exception as e:
+            logger.warning(f"RecallGuard prompt template failed: {e}")
+            return DEFAULT_PROMPT_TEMPLATE.format(**values)
+
+
+class OutboundPayload:
+    def __init__(
+        self,
+        record: CacheRecord,
+        prompt_text: str,
+        native_builder: Callable[[CacheRecord], List[Dict[str, Any]]],
+        chain_builder: Callable[[CacheRecord], Optional[MessageChain]],
+    ):
+        self.record = record
+        self.prompt_text = prompt_text
+        self._native_builder = native_builder
+        self._chain_builder = chain_builder
+        self._merged: Dict[str, List[Dict[str, Any]]] = {}
+
+    @cached_property
+    def prompt_segment(self) -> Dict[str, Any]:
+        return cqhttp_forwarder.text_to_segment(self.prompt_text)
+
+    @cached_property
+    def native_segments(self) -> List[Dict[str, Any]]:
+        return self._native_builder(self.record)
+
+    @cached_property
+    def prompt_and_native(self) -> List[Dict[str, Any]]:
+        return [self.prompt_segment, *self.native_segments]
+
+    @cached_property
+    def prompt_chain(self) -> MessageChain:
+        return MessageChain([CompPlain(text=self.prompt_text)])
+
+    @cached_property
+    def content_chain(self) -> Optional[MessageChain]:
+        return self._chain_builder(self.record)
+
+    @cached_property
+    def content_node(self) -> Dict[str, Any]:
+        return cqhttp_forwarder.create_forward_node(self.record.sender_id, self.record.sender_name, self.native_segments)
+
+    def merged_nodes(self, bot_self_id: str) -> List[Dict[str, Any]]:
+        nodes = self._merged.get(bot_self_id)
+        if nodes is None:
+            nodes = self._merged[bot_self_id] = [
+                cqhttp_forwarder.create_forward_node(bot_self_id, "RecallGuard", [self.prompt_segment]),
+                self.content_node,
+            ]
+        return nodes
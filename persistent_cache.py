@@ -0,0 +1,210 @@
+"""SQLite-backed persistence for RecallGuard cache records."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from astrbot.api import logger
+
+from .message_cache import CacheRecord
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    cache_key TEXT PRIMARY KEY,
+    message_id TEXT NOT NULL,
+    sender_id TEXT NOT NULL,
+    sender_name TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    segments TEXT NOT NULL,
+    run_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_message_id ON entries (message_id);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+"""
+
+COLUMNS = "cache_key, message_id, sender_id, sender_name, group_id, group_name, timestamp, segments"
+
+
+def _row_to_record(row: Tuple[Any, ...]) -> CacheRecord:
+    cache_key, message_id, sender_id, sender_name, group_id, group_name, timestamp, segments = row
+    return CacheRecord(
+        message_id=message_id,
+        cache_key=cache_key,
+        sender_id=sender_id,
+        sender_name=sender_name,
+        group_id=group_id,
+        group_name=group_name,
+        timestamp=timestamp,
+        segments=json.loads(segments),
+    )
+
+
+def _local_paths(segments: List[Dict[str, Any]]) -> List[str]:
+    return [
+        segment["data"]["local_path"]
+        for segment in segments
+        if isinstance(segment.get("data"), dict) and segment["data"].get("local_path")
+    ]
+
+
+class PersistentCache:
+    def __init__(self, db_path: str, flush_interval: float = 1.0, batch_size: int = 500):
+        self.db_path = db_path
+        self.flush_interval = max(float(flush_interval), 0.05)
+        self.batch_size = max(int(batch_size), 1)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recallguard-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: Dict[str, Optional[Tuple[Any, ...]]] = {}
+        self._wakeup = asyncio.Event()
+        self._opened = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.run_id = time.time_ns()
+        self.failed = False
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+        except Exception:
+            conn.close()
+            raise
+        self._conn = conn
+
+    async def open(self):
+        try:
+            await self._run(self._open)
+        except Exception:
+            self.failed = True
+            self._pending.clear()
+            raise
+        finally:
+            self._opened.set()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def save(self, record: CacheRecord):
+        if self.failed:
+            return
+        self._pending[record.cache_key] = (
+            record.cache_key,
+            record.message_id,
+            record.sender_id,
+            record.sender_name,
+            record.group_id,
+            record.group_name,
+            record.timestamp,
+            json.dumps(record.segments, ensure_ascii=False),
+            self.run_id,
+        )
+        self._maybe_wakeup()
+
+    def delete(self, cache_key: str):
+        if self.failed:
+            return
+        self._pending[cache_key] = None
+        self._maybe_wakeup()
+
+    def _maybe_wakeup(self):
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _write_batch(self, batch: Dict[str, Optional[Tuple[Any, ...]]]):
+        rows = [row for row in batch.values() if row is not None]
+        deleted = [(cache_key,) for cache_key, row in batch.items() if row is None]
+        with self._conn:
+            self._conn.execute("BEGIN")
+            if deleted:
+                self._conn.executemany("DELETE FROM entries WHERE cache_key = ?", deleted)
+            if rows:
+                self._conn.executemany(f"INSERT OR REPLACE INTO entries ({COLUMNS}, run_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    async def flush(self):
+        if not self._pending or self._conn is None:
+            return
+        batch, self._pending = self._pending, {}
+        await self._run(self._write_batch, batch)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"RecallGuard persistent cache flush failed: {e}", exc_info=True)
+
+    def _take_by_message_id(self, message_id: str) -> List[CacheRecord]:
+        rows = self._conn.execute(f"SELECT {COLUMNS} FROM entries WHERE message_id = ?", (message_id,)).fetchall()
+        if rows:
+            with self._conn:
+                self._conn.executemany("DELETE FROM entries WHERE cache_key = ?", [(row[0],) for row in rows])
+        return [_row_to_record(row) for row in rows]
+
+    async def take(self, message_id: str) -> List[CacheRecord]:
+        await self._opened.wait()
+        if self._conn is None:
+            return []
+        records = []
+        for record in await self._run(self._take_by_message_id, message_id):
+            if record.cache_key not in self._pending:
+                records.append(record)
+        return records
+
+    def _take_expired(self, before: float) -> List[str]:
+        query = "FROM entries WHERE timestamp < ? AND run_id != ?"
+        rows = self._conn.execute(f"SELECT cache_key, segments {query}", (before, self.run_id)).fetchall()
+        if not rows:
+            return []
+        with self._conn:
+            self._conn.execute(f"DELETE {query}", (before, self.run_id))
+        paths: List[str] = []
+        for _, segments in rows:
+            paths.extend(_local_paths(json.loads(segments)))
+        return paths
+
+    async def take_expired(self, before: float) -> List[str]:
+        if self._conn is None:
+            return []
+        return await self._run(self._take_expired, before)
+
+    def _referenced_files(self) -> List[str]:
+        paths: List[str] = []
+        rows = self._conn.execute(
+            "SELECT segments FROM entries WHERE run_id != ? AND segments LIKE '%local_path%'",
+            (self.run_id,),
+        )
+        for (segments,) in rows:
+            paths.extend(_local_paths(json.loads(segments)))
+        return paths
+
+    async def referenced_files(self) -> List[str]:
+        await self._opened.wait()
+        if self._conn is None:
+            return []
+        return await self._run(self._referenced_files)
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+        try:
+            await self.flush()
+        finally:
+            if self._conn is not None:
+                await self._run(self._conn.close)
+                self._conn = None
+            self._executor.shutdown(wait=False)
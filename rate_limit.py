@@ -0,0 +1,27 @@
+"""Token-bucket rate limiting for RecallGuard outbound sends."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, burst: float):
+        self.rate = max(float(rate_per_second), 0)
+        self.capacity = max(float(burst), 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1):
+        if self.rate <= 0:
+            return
+        while True:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self._tokens) / self.rate)
@@ -0,0 +1,147 @@
+"""Refcount and concurrency tests for the RecallGuard media store.
+
+Run from an environment where AstrBot is importable:
+
+    python -m unittest discover -s tests
+"""
+
+import asyncio
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import unittest
+
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "recallguard_tests"
+
+
+def load_plugin_module(name: str) -> types.ModuleType:
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [PLUGIN_DIR]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
+
+
+cache_io = load_plugin_module("cache_io")
+media_store = load_plugin_module("media_store")
+
+
+class MediaStoreTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="recallguard-test-")
+        self.source_dir = os.path.join(self.workdir, "napcat")
+        self.cache_dir = os.path.join(self.workdir, "cache")
+        os.makedirs(self.source_dir)
+        os.makedirs(self.cache_dir)
+        self.io = cache_io.CacheIO(4, "auto")
+        self.store = media_store.MediaStore(self.cache_dir, self.io)
+
+    def tearDown(self):
+        self.io.shutdown()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def make_source(self, name: str, size: int = 64 * 1024) -> str:
+        path = os.path.join(self.source_dir, name)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        return path
+
+    def refuse_hardlinks(self):
+        async def link(source_path, dest_path):
+            await asyncio.sleep(0.01)
+            return None
+
+        self.io.link = link
+
+    def delay_unlinks(self, seconds: float):
+        def discard(paths):
+            paths = list(paths)
+
+            def remove():
+                time.sleep(seconds)
+                return cache_io._remove_files(paths)
+
+            return self.io._submit(remove)
+
+        self.io.discard = discard
+
+    async def test_concurrent_stores_write_once(self):
+        source = self.make_source("a.jpg")
+        results = await asyncio.gather(*(self.store.store(source, ".jpg") for _ in range(5)))
+        paths = {path for path, _ in results}
+        self.assertEqual(len(paths), 1)
+        path = paths.pop()
+        self.assertEqual(sorted(strategy for _, strategy in results).count("dedup"), 4)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(self.store.total_bytes, 64 * 1024)
+        self.assertEqual(self.store.dedup_hits, 4)
+
+    async def test_release_deletes_after_last_reference(self):
+        source = self.make_source("a.jpg")
+        path, _ = await self.store.store(source, ".jpg")
+        await self.store.store(source, ".jpg")
+        self.assertFalse(self.store.release(path))
+        self.assertTrue(self.store.is_managed(path))
+        self.assertTrue(self.store.release(path))
+        self.assertFalse(self.store.is_managed(path))
+        await asyncio.sleep(0.05)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.store.total_bytes, 0)
+
+    async def test_waiters_do_not_dedup_against_unwritten_file(self):
+        self.refuse_hardlinks()
+        source = self.make_source("a.jpg")
+        results = await asyncio.gather(*(self.store.store(source, ".jpg") for _ in range(3)))
+        for path, _ in results:
+            self.assertTrue(os.path.exists(path))
+        self.assertEqual(len({path for path, _ in results}), 1)
+        self.assertEqual(self.store.total_bytes, 64 * 1024)
+
+    async def test_failed_write_drops_every_reference(self):
+        async def copy(source_path, dest_path, max_bytes=0):
+            await asyncio.sleep(0.01)
+            return None
+
+        self.refuse_hardlinks()
+        self.io.copy = copy
+        source = self.make_source("a.jpg")
+        results = await asyncio.gather(*(self.store.store(source, ".jpg") for _ in range(3)))
+        self.assertEqual(results, [None, None, None])
+        self.assertEqual(self.store.file_count, 0)
+        self.assertEqual(self.store.total_bytes, 0)
+        for name in os.listdir(self.cache_dir):
+            self.assertFalse(self.store.is_managed(os.path.join(self.cache_dir, name)))
+
+    async def test_store_waits_for_pending_unlink(self):
+        source = self.make_source("a.jpg")
+        self.delay_unlinks(0.1)
+        path, _ = await self.store.store(source, ".jpg")
+        self.store.release(path)
+        stored_path, _ = await self.store.store(source, ".jpg")
+        self.assertEqual(stored_path, path)
+        await asyncio.sleep(0.2)
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(self.store.is_managed(path))
+
+
+    async def test_files_by_age_survives_removal_while_walking(self):
+        self.store.seed([(os.path.join(self.cache_dir, f"{index}.jpg"), 10, float(index)) for index in range(6)])
+        self.store.acquire(os.path.join(self.cache_dir, "1.jpg"))
+        walked = []
+        for path in self.store.files_by_age():
+            walked.append(os.path.basename(path))
+            self.store.remove_orphan(path)
+            if self.store.total_bytes <= 20:
+                break
+        self.assertEqual(walked, ["0.jpg", "1.jpg", "2.jpg", "3.jpg", "4.jpg"])
+        self.assertEqual(self.store.file_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()